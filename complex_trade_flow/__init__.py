@@ -1,5 +1,11 @@
 from .trade_data_loader import TradeDataLoader
-from .networks import TradeNetwork
+from .networks import TradeNetwork, TradeNetworkCache
+from .trade_tensor import TradeTensor
 from .diversity_metrics import DiversityCalculator
-from .analyzers import EconomicDiversityAnalyzer
+from .trade_metrics import TradeMetricsCalculator
+from .complexity import ComplexityCalculator
+from .product_space import ProductSpace
+from .indicators import IndicatorStore
+from .trade_graph import TradeGraph
+from .analyzers import EconomicDiversityAnalyzer, CenterPeripheryAnalyzer
 from .utils import ClassificationScheme
@@ -1,6 +1,9 @@
 from __future__ import annotations
 
+import json
 import os
+import shutil
+import tempfile
 
 import pandas as pd
 
@@ -8,12 +11,36 @@ from collections.abc import Callable
 from pandas import DataFrame
 from scipy.stats import stats
 from tqdm import tqdm
-from joblib import Parallel, delayed
+from joblib import Parallel, delayed, effective_n_jobs
 
+from .center_periphery import CenterPeripheryIdentifier, ElasticityCalculator
+from .complexity import ComplexityCalculator
 from .constants import EconomicComplexity, BACIColumnsTradeData
 from .diversity_metrics import DiversityCalculator
+from .indicators import IndicatorStore
+from .run_manifest import RunManifest
+from .trade_data_loader import DEFAULT_TRADE_DATA_COLUMNS, TradeDataLoader
+from .trade_metrics import TradeMetricsCalculator
 from .utils import ClassificationScheme
 from complex_trade_flow import TradeNetwork
+from .networks import SharedTradeNetwork, TradeNetworkCache
+from .trade_graph import INCOME, PROPENSITY, TradeGraph
+
+# Directorio en memoria donde se publican las redes compartidas con los procesos, salvo que se
+# indique otro en `EconomicDiversityAnalyzer` o en la variable de entorno SHARED_MEMORY_DIR
+SHARED_MEMORY_DIR = "/dev/shm"
+
+
+def select_shared_folder(required_bytes: int, preferred: str | None = None) -> str:
+    """
+    Elige el directorio donde publicar una red compartida: el preferido si existe y tiene espacio
+    libre para `required_bytes` (p. ej. el /dev/shm de 64 MB de Docker no alcanza para un año
+    clasificado), y si no el directorio temporal del sistema.
+    """
+    preferred = preferred or os.getenv("SHARED_MEMORY_DIR", SHARED_MEMORY_DIR)
+    if os.path.isdir(preferred) and shutil.disk_usage(preferred).free > required_bytes:
+        return preferred
+    return tempfile.gettempdir()
 
 
 class EconomicDiversityAnalyzer:
@@ -24,66 +51,286 @@ class EconomicDiversityAnalyzer:
             self,
             start_year: int,
             end_year: int,
-            classification_schemes: list[ClassificationScheme]
+            classification_schemes: list[ClassificationScheme],
+            n_jobs: int = -1,
+            chunk_size: int = 8,
+            cache: TradeNetworkCache | None = None,
+            shared_memory_dir: str | None = None
     ):
+        """
+        Args:
+            start_year: First year to analyze.
+            end_year: Last year to analyze.
+            classification_schemes: Classification schemes applied to every network.
+            n_jobs: Number of joblib workers for the per-entity analyses.
+            chunk_size: Number of entities evaluated by each joblib task of the per-entity analyses.
+            cache: Optional cache of loaded networks, reused across calls to `analyze_year`.
+            shared_memory_dir: Preferred directory where the per-entity analyses publish the network
+                for the workers. Defaults to $SHARED_MEMORY_DIR or /dev/shm; the system temporary
+                directory is used instead when it does not have room for the network.
+        """
         self.start_year = start_year
         self.end_year = end_year
         self.classification_schemes = classification_schemes
+        self.n_jobs = n_jobs
+        self.chunk_size = chunk_size
+        self.cache = cache
+        self.shared_memory_dir = shared_memory_dir
         self.analysis_dict: dict[EconomicComplexity, Callable] = {
             EconomicComplexity.ENTITY_PRODUCT_DIVERSIFICATION.value: self.compute_entity_product_diversification,
             EconomicComplexity.ENTITY_TRADE_METRICS.value: self.compute_entity_trade_metrics
         }
+        # Analyses computed for every entity of a scheme in one vectorized pass
+        self.batch_analysis_dict: dict[EconomicComplexity, Callable] = {
+            EconomicComplexity.ENTITY_PRODUCT_DIVERSIFICATION.value: self.compute_product_diversification_by_entity,
+            EconomicComplexity.ENTITY_TRADE_METRICS.value: TradeMetricsCalculator.calculate_trade_metrics_by_entity,
+            EconomicComplexity.ECONOMIC_COMPLEXITY_INDEX.value: ComplexityCalculator.calculate_complexity_by_entity,
+            EconomicComplexity.FITNESS_COMPLEXITY.value: self.compute_fitness_complexity_by_entity,
+        }
+        # Last fitness (by entity) and complexity (by product) of each scheme, used as warm start.
+        # Only sequential runs chain them from year to year; see `compute_fitness_complexity_by_entity`
+        self.fitness_complexity_warm_starts: dict[str, tuple[pd.Series, pd.Series]] = {}
+        # Trade data columns each analysis needs, when they differ from the loader defaults
+        self.analysis_columns: dict[EconomicComplexity, list[str]] = {
+            EconomicComplexity.ENTITY_TRADE_METRICS.value: DEFAULT_TRADE_DATA_COLUMNS + [BACIColumnsTradeData.MASS.value],
+        }
 
     def analyze_year(
             self, year: int,
             scheme_name: str,
             type_analysis: EconomicComplexity,
-            base_directory: str
+            base_directory: str,
+            vectorized: bool = True
     ) -> DataFrame:
-        network = TradeNetwork.from_year(
+        """
+        Runs an analysis for every entity of a classification scheme in a given year.
+
+        Args:
+            year: The year to analyze.
+            scheme_name: The classification scheme name.
+            type_analysis: The analysis to run.
+            base_directory: Directory of the cleaned trade data.
+            vectorized: Use the batch implementation of the analysis when available instead of
+                running the per-entity analysis in parallel.
+
+        Returns:
+            DataFrame: One row per entity.
+        """
+        network = self.load_network(year, type_analysis, base_directory)
+        analysis_df = self.analyze_network(network, year, scheme_name, type_analysis, vectorized=vectorized)
+        if self.cache is not None:
+            self.cache.trim()  # The analysis may have built entity indexes or a tensor on the network
+        return analysis_df
+
+    def load_network(self, year: int, type_analysis: EconomicComplexity, base_directory: str) -> TradeNetwork:
+        """
+        Loads the trade network of a year with every classification scheme and the columns the analysis needs.
+        """
+        if self.cache is not None:
+            return self.cache.get(
+                year,
+                base_directory=base_directory,
+                classification_schemes=self.classification_schemes,
+                columns=self.analysis_columns.get(type_analysis.value)
+            )
+        return TradeNetwork.from_year(
             year,
             classification_schemes=self.classification_schemes,
-            base_directory=base_directory
+            base_directory=base_directory,
+            columns=self.analysis_columns.get(type_analysis.value)
         )
 
+    def analyze_network(
+            self,
+            network: TradeNetwork,
+            year: int,
+            scheme_name: str,
+            type_analysis: EconomicComplexity,
+            vectorized: bool = True
+    ) -> DataFrame:
+        """
+        Runs an analysis for every entity of a classification scheme on an already loaded network.
+        See `analyze_year`.
+        """
+        # Analyses that are not defined entity by entity (e.g. ECI) only have the batch implementation
+        if type_analysis.value in self.batch_analysis_dict and (
+                vectorized or type_analysis.value not in self.analysis_dict
+        ):
+            return self.batch_analysis_dict[type_analysis.value](network, scheme_name)
+
         analysis: Callable = self.analysis_dict[type_analysis.value]
+        entities = list(network.entities[scheme_name])
+        entity_chunks = [
+            entities[start:start + self.chunk_size] for start in range(0, len(entities), self.chunk_size)
+        ]
 
-        results = Parallel(n_jobs=-1)(
-            delayed(analysis)(network, entity, scheme_name) for entity in
-            tqdm(network.entities[scheme_name], desc=f"Analyzing year {year}")
-        )
+        # The network is published once as memory-mapped arrays; workers receive a light
+        # reference and attach to it without copying, instead of unpickling the whole network
+        shared_folder_parent = select_shared_folder(network.memory_usage(), self.shared_memory_dir)
+        with tempfile.TemporaryDirectory(dir=shared_folder_parent) as shared_folder:
+            shared_network = network.share(shared_folder)
+            results = Parallel(n_jobs=self.n_jobs)(
+                delayed(self._analyze_entities)(shared_network, analysis, entity_chunk, scheme_name)
+                for entity_chunk in tqdm(entity_chunks, desc=f"Analyzing year {year}")
+            )
+            # With n_jobs=1 the chunks run in this process, which must not keep the deleted arrays mapped
+            shared_network.detach()
 
-        return pd.DataFrame(results)
+        return pd.DataFrame([result for chunk_results in results for result in chunk_results])
+
+    @staticmethod
+    def _analyze_entities(
+            shared_network: SharedTradeNetwork,
+            analysis: Callable,
+            entities: list[str],
+            scheme_name: str
+    ) -> list[dict]:
+        """
+        Runs a per-entity analysis for a chunk of entities on a shared trade network.
+        """
+        trade_network = shared_network.attach()
+        return [analysis(trade_network, entity, scheme_name) for entity in entities]
 
     def run_analysis(
             self,
             type_analysis: EconomicComplexity,
             output_directory: str,
             base_directory: str,
+            vectorized: bool = True,
+            n_workers: int = 1,
+            max_resident_years: int | None = None,
+            resume: bool = True,
     ) -> None:
         """
         Runs the diversity analysis for each year and classification scheme, and stores the results.
+
+        Completed units are recorded in a `RunManifest` in the output directory together with the
+        fingerprints of their inputs, so an interrupted or repeated run only recomputes the
+        (scheme, year) units that are missing or whose cleaned data, classification or analysis
+        options (`analysis_options`) changed.
+
+        Args:
+            type_analysis: The analysis to run.
+            output_directory: Directory where the results are saved.
+            base_directory: Directory of the cleaned trade data.
+            vectorized: Use the batch implementation of the analysis when available.
+            n_workers: Number of processes the years are distributed across. Each year is loaded
+                once and every classification scheme is evaluated on it.
+            max_resident_years: Maximum number of years loaded in memory at the same time across
+                all workers. It caps the number of concurrent workers and, when the analyzer has a
+                cache, the number of networks each worker's cache keeps (`max_resident_years //
+                workers`, at least one). Defaults to no cap.
+            resume: Skip the units that are up to date in the run manifest.
         """
+        manifest = RunManifest(output_directory)
+        years = range(self.start_year, self.end_year + 1)
 
-        for scheme in self.classification_schemes:
-            for year in range(self.start_year, self.end_year + 1):
-                print(f"Analyzing {scheme.name} for {year}...")
-                analysis_df = self.analyze_year(
-                    year,
-                    scheme.name,
-                    type_analysis,
-                    base_directory=base_directory,
+        n_jobs = effective_n_jobs(n_workers)
+        if max_resident_years is not None:
+            n_jobs = min(n_jobs, max_resident_years)
+            if self.cache is not None:
+                # Each worker holds the year it analyzes plus what its copy of the cache keeps
+                self.cache.max_networks = max(1, max_resident_years // n_jobs)
+                self.cache.trim()
+
+        if n_jobs == 1:
+            year_results = (
+                self._run_year(year, type_analysis, output_directory, base_directory, vectorized, manifest if resume else None)
+                for year in years
+            )
+        else:
+            year_results = Parallel(n_jobs=n_jobs, return_as="generator")(
+                delayed(self._run_year)(
+                    year, type_analysis, output_directory, base_directory, vectorized, manifest if resume else None
                 )
-                self.save_csv(analysis_df, output_directory, scheme.name, year, type_analysis.value)
+                for year in years
+            )
+
+        for year, saved_outputs in zip(years, year_results):
+            for scheme_name, fingerprint, output_path in saved_outputs:
+                manifest.record(type_analysis.value, scheme_name, year, fingerprint, output_path)
+
+    def analysis_options(self, type_analysis: EconomicComplexity, vectorized: bool) -> dict:
+        """
+        Options of an analysis that change its results, recorded in the run manifest fingerprints.
+        """
+        return {
+            "vectorized": vectorized,
+            "columns": self.analysis_columns.get(type_analysis.value, DEFAULT_TRADE_DATA_COLUMNS),
+        }
+
+    def _run_year(
+            self,
+            year: int,
+            type_analysis: EconomicComplexity,
+            output_directory: str,
+            base_directory: str,
+            vectorized: bool,
+            manifest: RunManifest | None = None
+    ) -> list[tuple[str, dict, str]]:
+        """
+        Loads a year once and runs the analysis for every classification scheme, saving each result.
+
+        Args:
+            manifest: Run manifest of the output directory; the schemes whose results are up to date
+                in it are skipped (and the year is not loaded if all of them are).
+
+        Returns:
+            list[tuple[str, dict, str]]: The scheme name, input fingerprint and output path of every
+            saved result.
+        """
+        trade_data_file = TradeDataLoader(base_directory).find_trade_data_file(year)
+        options = self.analysis_options(type_analysis, vectorized)
+        network = None
+        saved_outputs = []
+        for scheme in self.classification_schemes:
+            fingerprint = RunManifest.input_fingerprint(trade_data_file, scheme, options)
+            if manifest is not None and manifest.is_up_to_date(type_analysis.value, scheme.name, year, fingerprint):
+                print(f"Skipping {scheme.name} for {year}, results are up to date")
+                continue
+            if network is None:
+                network = self.load_network(year, type_analysis, base_directory)
+            print(f"Analyzing {scheme.name} for {year}...")
+            analysis_df = self.analyze_network(network, year, scheme.name, type_analysis, vectorized=vectorized)
+            if self.cache is not None:
+                self.cache.trim()
+            output_path = self.save_csv(analysis_df, output_directory, scheme.name, year, type_analysis.value)
+            saved_outputs.append((scheme.name, fingerprint, output_path))
+        return saved_outputs
 
     @staticmethod
-    def save_csv(df, output_directory, scheme_name, year, analysis):
+    def save_csv(df, output_directory, scheme_name, year, analysis) -> str:
         # TODO: esta función de guarado esta acoplada a la diversidad
         output_path = os.path.join(output_directory, analysis)
         os.makedirs(output_path, exist_ok=True)
         output_filename = f"{scheme_name}_{analysis}_{year}.csv"
         df.to_csv(os.path.join(output_path, output_filename), index=False)
         print(f"Saved results to {os.path.join(output_path, output_filename)}")
+        return os.path.join(output_path, output_filename)
+
+    def compute_fitness_complexity_by_entity(self, trade_network: TradeNetwork, scheme_name: str) -> DataFrame:
+        """
+        Calculates the fitness of every entity of the scheme, starting the iteration from the last
+        solution computed for the same scheme by this analyzer.
+
+        The warm start lives in the analyzer, so it only carries over within one process: in
+        `run_analysis` with `n_workers=1` each year starts from the previous computed year of the
+        scheme (years skipped on resume are not part of the chain), while with several workers every
+        year starts cold. The warm start only changes the number of iterations, not the result
+        (up to `FITNESS_TOLERANCE`).
+        """
+        initial_fitness, initial_complexity = self.fitness_complexity_warm_starts.get(scheme_name, (None, None))
+        entity_fitness, product_complexity = ComplexityCalculator.calculate_fitness_complexity_by_entity(
+            trade_network,
+            scheme_name,
+            initial_fitness=initial_fitness,
+            initial_complexity=initial_complexity
+        )
+        self.fitness_complexity_warm_starts[scheme_name] = (
+            entity_fitness.set_index(scheme_name)["FITNESS"].dropna(),
+            product_complexity.set_index(BACIColumnsTradeData.PRODUCT_CATEGORY_CODE.value)["COMPLEXITY"].dropna(),
+        )
+        return entity_fitness
 
     @staticmethod
     def compute_entity_product_diversification(
@@ -108,6 +355,23 @@ class EconomicDiversityAnalyzer:
             ),
         }
 
+    @staticmethod
+    def compute_product_diversification_by_entity(
+            trade_network: TradeNetwork,
+            scheme_name: str
+    ) -> DataFrame:
+        """
+        Batch version of `compute_entity_product_diversification` for every entity of the scheme.
+        """
+        diversity = DiversityCalculator.calculate_diversity_index_by_entity(
+            trade_network=trade_network,
+            scheme_name=scheme_name
+        )
+        return DataFrame({
+            scheme_name: diversity.index,
+            "export_product_diversity": diversity["export_diversity"].to_numpy(),
+            "import_product_diversity": diversity["import_diversity"].to_numpy(),
+        })
 
     @staticmethod
     def compute_entity_trade_metrics(
@@ -187,3 +451,80 @@ class EconomicDiversityAnalyzer:
             "CENTER_PERIPHERY_LEVEL": money_gain_exportation / money_loss_importation if money_loss_importation > 0 else float(
             'inf'),
         }
+
+
+class CenterPeripheryAnalyzer:
+    """
+    Identifies the center-periphery structure of the trade network of every year, from the cleaned
+    BACI data and the World Bank propensity to import and income.
+    """
+    ANALYSIS = "center_periphery"
+
+    def __init__(self, start_year: int, end_year: int, indicator_store: IndicatorStore, n_jobs: int = -1):
+        """
+        Args:
+            start_year: First year to analyze.
+            end_year: Last year to analyze.
+            indicator_store: Local store of the World Bank indicators.
+            n_jobs: Number of joblib workers the years are distributed across.
+        """
+        self.start_year = start_year
+        self.end_year = end_year
+        self.indicator_store = indicator_store
+        self.n_jobs = n_jobs
+
+    def build_trade_graph(self, network: TradeNetwork, year: int) -> TradeGraph:
+        """
+        Builds the normalized trade graph of the countries with propensity and income data.
+
+        Countries without either indicator are dropped and every row of the adjacency is then
+        divided by its total, as in the sandbox `RedComercial.normalizar`.
+
+        Returns:
+            TradeGraph: The normalized graph, with the propensity to import (as a fraction) and the
+            income as node attributes.
+        """
+        graph = self.indicator_store.enrich(TradeGraph.from_trade_network(network), year)
+        graph.set_node_attribute(PROPENSITY, graph.node_attributes[PROPENSITY] / 100)
+        return graph.normalize()
+
+    def analyze_year(self, year: int, base_directory: str) -> dict:
+        """
+        Computes the elasticities of a year and identifies its center-periphery levels.
+
+        Returns:
+            dict: The year, the analyzed countries and the levels of `CenterPeripheryIdentifier.identify`.
+        """
+        graph = self.build_trade_graph(TradeNetwork.from_year(year, base_directory=base_directory), year)
+        propensity, income = graph.node_attributes[PROPENSITY], graph.node_attributes[INCOME]
+        elasticities = ElasticityCalculator.calculate_elasticity_matrix(graph.adjacency.toarray(), propensity, income)
+        countries = list(graph.nodes)
+        levels = CenterPeripheryIdentifier(elasticities, propensity, income, countries).identify()
+        return {"year": year, "countries": countries, "levels": levels}
+
+    def run_analysis(self, output_directory: str, base_directory: str) -> list[str]:
+        """
+        Runs the identification for every year, spreading the years across processes, and saves
+        each result as JSON.
+
+        Returns:
+            list[str]: The paths of the saved results.
+        """
+        return Parallel(n_jobs=self.n_jobs)(
+            delayed(self._run_year)(year, output_directory, base_directory)
+            for year in range(self.start_year, self.end_year + 1)
+        )
+
+    def _run_year(self, year: int, output_directory: str, base_directory: str) -> str:
+        print(f"Identifying center-periphery structure for {year}...")
+        return self.save_json(self.analyze_year(year, base_directory), output_directory, year)
+
+    @classmethod
+    def save_json(cls, result: dict, output_directory: str, year: int) -> str:
+        output_path = os.path.join(output_directory, cls.ANALYSIS)
+        os.makedirs(output_path, exist_ok=True)
+        output_file = os.path.join(output_path, f"{cls.ANALYSIS}_{year}.json")
+        with open(output_file, "w") as file:
+            json.dump(result, file, indent=2, default=float)
+        print(f"Saved results to {output_file}")
+        return output_file
@@ -0,0 +1,340 @@
+"""
+Trade influence, trade feedback and balance of trade power between groups of countries, and the
+identification of center-periphery structures (Cajas, 2025).
+
+Production version of sandbox/centro_periferia_refactor.py working on NumPy arrays.
+"""
+from __future__ import annotations
+
+from typing import Sequence
+
+import networkx as nx
+import numpy as np
+from scipy import linalg
+
+from .trade_graph import INCOME, PROPENSITY
+
+
+class ElasticityCalculator:
+    """
+    Computes the income-income elasticity matrix of a trade network (equation 12):
+
+    E = D_y D_m A (I - D_m A)^-1 D_y^-1
+
+    where A holds the import coefficients, D_m the average propensities to import and D_y the
+    income levels.
+    """
+
+    @staticmethod
+    def calculate_elasticity_matrix(
+            import_coefficients: np.ndarray,
+            propensity: np.ndarray,
+            income: np.ndarray
+    ) -> np.ndarray:
+        """
+        Calculates the elasticity matrix with a single LU factorization.
+
+        With B = D_m A, the product X = B (I - B)^-1 is the solution of (I - B)^T X^T = B^T, and the
+        diagonal matrices are applied as row and column scalings instead of matrix products.
+
+        Args:
+            import_coefficients (np.ndarray): The n x n import coefficient matrix A.
+            propensity (np.ndarray): The propensity to import of each node (n values, as fractions).
+            income (np.ndarray): The income of each node (n values).
+
+        Returns:
+            np.ndarray: The n x n elasticity matrix E.
+        """
+        import_coefficients = np.asarray(import_coefficients, dtype=np.float64)
+        propensity = np.asarray(propensity, dtype=np.float64)
+        income = np.asarray(income, dtype=np.float64)
+
+        scaled_coefficients = propensity[:, None] * import_coefficients
+        leontief = np.eye(len(scaled_coefficients)) - scaled_coefficients
+        multiplier = linalg.solve(leontief.T, scaled_coefficients.T).T
+        return income[:, None] * multiplier / income[None, :]
+
+    @staticmethod
+    def to_graph(
+            elasticities: np.ndarray,
+            nodes: Sequence[str],
+            propensity: np.ndarray | None = None,
+            income: np.ndarray | None = None
+    ) -> nx.DiGraph:
+        """
+        Builds the trade influence network: a directed graph weighted by the elasticities.
+
+        Args:
+            elasticities (np.ndarray): The n x n elasticity matrix.
+            nodes (Sequence[str]): The label of each row/column.
+            propensity (np.ndarray, optional): Stored as the `PROPENSITY` node attribute.
+            income (np.ndarray, optional): Stored as the `INCOME` node attribute.
+
+        Returns:
+            nx.DiGraph: The trade influence network.
+        """
+        graph = nx.relabel_nodes(
+            nx.from_numpy_array(elasticities, create_using=nx.DiGraph()),
+            dict(enumerate(nodes))
+        )
+        for attribute, values in ((PROPENSITY, propensity), (INCOME, income)):
+            if values is not None:
+                nx.set_node_attributes(graph, dict(zip(nodes, np.asarray(values).tolist())), attribute)
+        return graph
+
+
+class TradePowerCalculator:
+    """
+    Trade influence (equations 16-19), relative trade feedback (equation 27) and balance of trade
+    power (equations 28-29) for many groups at once.
+
+    A group is an income participation vector w (income shares of its members, 0 elsewhere); k groups
+    are stacked as the columns of an n x k matrix W, so every metric of the k groups comes from a few
+    matrix products.
+    """
+
+    def __init__(self, elasticities: np.ndarray, propensity: np.ndarray):
+        """
+        Args:
+            elasticities (np.ndarray): The n x n elasticity matrix.
+            propensity (np.ndarray): The propensity to import of each node.
+        """
+        self.elasticities = np.asarray(elasticities, dtype=np.float64)
+        self.propensity = np.asarray(propensity, dtype=np.float64)
+
+    @staticmethod
+    def participation_matrix(income: np.ndarray, memberships: np.ndarray) -> np.ndarray:
+        """
+        Builds the participation vectors of k groups.
+
+        Args:
+            income (np.ndarray): The income of each of the n nodes.
+            memberships (np.ndarray): Boolean n x k matrix, True where the node belongs to the group
+                (a 1-D mask is a single group).
+
+        Returns:
+            np.ndarray: The n x k matrix W whose columns are the income shares of each group.
+        """
+        memberships = np.asarray(memberships, dtype=bool)
+        if memberships.ndim == 1:
+            memberships = memberships[:, None]
+        group_income = np.where(memberships, np.asarray(income, dtype=np.float64)[:, None], 0.0)
+        return group_income / group_income.sum(axis=0)
+
+    def node_to_group_influence(self, participation: np.ndarray) -> np.ndarray:
+        """
+        Influence of every node on every group, E W (n x k).
+        """
+        return self.elasticities @ participation
+
+    def group_to_node_influence(self, participation: np.ndarray) -> np.ndarray:
+        """
+        Influence of every group on every node, E^T W (n x k).
+        """
+        return self.elasticities.T @ participation
+
+    def influence(self, origin: np.ndarray, destination: np.ndarray) -> np.ndarray:
+        """
+        Influence of every origin group on every destination group, W_o^T E W_d (k_o x k_d).
+        """
+        return origin.T @ self.elasticities @ destination
+
+    def paired_influence(self, origin: np.ndarray, destination: np.ndarray) -> np.ndarray:
+        """
+        Influence of the j-th origin group on the j-th destination group, w_oj^T E w_dj (k values),
+        without computing the whole k x k matrix.
+        """
+        return np.einsum("ij,ij->j", origin, self.elasticities @ destination)
+
+    def relative_feedback(self, participation: np.ndarray) -> np.ndarray:
+        """
+        Relative trade feedback of every group: its feedback w^T E w divided by the feedback of a
+        homogeneous structure, k w^T D_m w / (n (1 - mean(m))), where k is the number of members.
+
+        Returns:
+            np.ndarray: One value per column of `participation`.
+        """
+        feedback = self.paired_influence(participation, participation)
+        homogeneous_feedback = (
+            np.count_nonzero(participation > 0, axis=0)
+            * np.einsum("i,ij,ij->j", self.propensity, participation, participation)
+        ) / (len(self.elasticities) * (1 - self.propensity.mean()))
+        return feedback / homogeneous_feedback
+
+    def balance_of_power(self, center: np.ndarray, periphery: np.ndarray) -> np.ndarray:
+        """
+        Balance of trade power of the j-th center over the j-th periphery:
+
+        RF(c) TI(c, p) - RF(p) TI(p, c)
+
+        Args:
+            center (np.ndarray): The n x k participation matrix of the centers.
+            periphery (np.ndarray): The n x k participation matrix of the peripheries.
+
+        Returns:
+            np.ndarray: One balance per candidate pair.
+        """
+        return (
+            self.relative_feedback(center) * self.paired_influence(center, periphery)
+            - self.relative_feedback(periphery) * self.paired_influence(periphery, center)
+        )
+
+
+class CenterPeripheryIdentifier:
+    """
+    Identifies nested center-periphery structures (Table 5.1).
+
+    Countries are sorted by their trade influence on the rest of the world. At every level the
+    provisional center grows one country at a time following that order, and the center with the
+    largest positive balance of trade power over the remaining countries (the periphery) becomes the
+    level; its countries are removed and the search continues with the rest while more than two
+    countries remain.
+
+    The elasticity matrix is kept as an array and removed countries are masked out. While the center
+    grows, E a and E^T a (a being the income vector of the center) are updated with one row and one
+    column of E, so every quadratic form of the balance is obtained in O(n) per candidate and O(n^2)
+    per level.
+    """
+
+    def __init__(
+            self,
+            elasticities: np.ndarray,
+            propensity: np.ndarray,
+            income: np.ndarray,
+            nodes: Sequence[str]
+    ):
+        """
+        Args:
+            elasticities (np.ndarray): The n x n elasticity matrix.
+            propensity (np.ndarray): The propensity to import of each node.
+            income (np.ndarray): The income of each node.
+            nodes (Sequence[str]): The label of each row/column.
+        """
+        self.elasticities = np.asarray(elasticities, dtype=np.float64)
+        self.propensity = np.asarray(propensity, dtype=np.float64)
+        self.income = np.asarray(income, dtype=np.float64)
+        self.nodes = list(nodes)
+
+    @classmethod
+    def from_graph(cls, influence_network: nx.DiGraph) -> "CenterPeripheryIdentifier":
+        """
+        Creates the identifier from a trade influence network with `propension` and `ingreso` node
+        attributes (see `ElasticityCalculator.to_graph`).
+        """
+        nodes = list(influence_network.nodes())
+        return cls(
+            elasticities=nx.to_numpy_array(influence_network, nodelist=nodes),
+            propensity=np.array([influence_network.nodes[node][PROPENSITY] for node in nodes]),
+            income=np.array([influence_network.nodes[node][INCOME] for node in nodes]),
+            nodes=nodes
+        )
+
+    def influence_on_rest_of_world(self) -> np.ndarray:
+        """
+        Calculates the trade influence of every country on the rest of the world, w_i^T E w_rest,
+        where w_rest holds the income shares of the other countries.
+        """
+        total_income = self.income.sum()
+        return (
+            self.elasticities @ self.income - np.diag(self.elasticities) * self.income
+        ) / (total_income - self.income)
+
+    def identify(self) -> dict[int, dict[str, list[str] | float]]:
+        """
+        Identifies the center-periphery levels.
+
+        Returns:
+            dict[int, dict[str, list[str] | float]]: For every level, the balance of trade power of its
+            center (`balance_poder`) and the countries of the center (`nodos`). The search stops early
+            if no center has a positive balance over the remaining countries.
+        """
+        influence = self.influence_on_rest_of_world()
+        # Stable sort, so that ties keep the order of the nodes as in the reference implementation
+        order = np.argsort(-influence, kind="stable")
+        remaining = np.ones(len(self.nodes), dtype=bool)
+
+        levels = {}
+        while remaining.sum() > 2:
+            center_size, balance = self._best_center(order[remaining[order]], np.flatnonzero(remaining))
+            if center_size == 0:
+                break
+            center = order[remaining[order]][:center_size]
+            levels[len(levels)] = {"balance_poder": balance, "nodos": [self.nodes[node] for node in center]}
+            remaining[center] = False
+        return levels
+
+    def _best_center(self, candidates: np.ndarray, remaining: np.ndarray) -> tuple[int, float]:
+        """
+        Evaluates the centers made of the first 1, 2, ..., len(candidates) - 1 candidates.
+
+        Args:
+            candidates (np.ndarray): The remaining nodes in influence order.
+            remaining (np.ndarray): The remaining nodes in their original order.
+
+        Returns:
+            tuple[int, float]: The size of the center with the largest positive balance (0 if none)
+            and its balance.
+        """
+        # Positions of the candidates within the remaining nodes
+        position = np.empty(len(self.nodes), dtype=np.int64)
+        position[remaining] = np.arange(len(remaining))
+        candidates = position[candidates]
+
+        elasticities = self.elasticities[np.ix_(remaining, remaining)]
+        propensity = self.propensity[remaining]
+        income = self.income[remaining]
+        homogeneous_scale = len(remaining) * (1 - propensity.mean())
+
+        total_propagation = elasticities @ income
+        total_reception = elasticities.T @ income
+        total_feedback = income @ total_propagation
+        total_propensity_form = np.sum(propensity * income ** 2)
+        total_size = np.count_nonzero(income > 0)
+        total_income = income.sum()
+
+        # Running quantities of the center a = income on the center, 0 elsewhere
+        center_propagation = np.zeros(len(remaining))  # E a
+        center_reception = np.zeros(len(remaining))  # E^T a
+        center_feedback = 0.0  # a^T E a
+        center_to_all = 0.0  # a^T E t
+        all_to_center = 0.0  # t^T E a
+        center_propensity_form = 0.0  # a^T D_m a
+        center_size = 0
+        center_income = 0.0
+
+        best_size, best_balance = 0, 0.0
+        for size, node in enumerate(candidates[:-1], start=1):
+            node_income = income[node]
+            center_feedback += node_income * (
+                center_propagation[node] + center_reception[node] + node_income * elasticities[node, node]
+            )
+            center_propagation += node_income * elasticities[:, node]
+            center_reception += node_income * elasticities[node, :]
+            center_to_all += node_income * total_propagation[node]
+            all_to_center += node_income * total_reception[node]
+            center_propensity_form += propensity[node] * node_income ** 2
+            center_size += node_income > 0
+            center_income += node_income
+
+            # b = t - a is the income vector of the periphery
+            center_to_periphery = center_to_all - center_feedback
+            periphery_to_center = all_to_center - center_feedback
+            periphery_feedback = total_feedback - center_to_all - all_to_center + center_feedback
+            periphery_propensity_form = total_propensity_form - center_propensity_form
+            periphery_size = total_size - center_size
+            periphery_income = total_income - center_income
+
+            center_relative_feedback = (
+                center_feedback * homogeneous_scale / (center_size * center_propensity_form)
+            )
+            periphery_relative_feedback = (
+                periphery_feedback * homogeneous_scale / (periphery_size * periphery_propensity_form)
+            )
+            balance = (
+                center_relative_feedback * center_to_periphery
+                - periphery_relative_feedback * periphery_to_center
+            ) / (center_income * periphery_income)
+
+            if balance > best_balance:
+                best_size, best_balance = size, balance
+        return best_size, float(best_balance)
@@ -1,37 +1,74 @@
 import pandas as pd
 import os
 
+from collections.abc import Iterator
+from functools import cached_property
+from pathlib import Path
 from pandas import DataFrame
 from dotenv import load_dotenv
+from joblib import Parallel, delayed
 
-from .constants import BACIColumnsTradeData, CountryCodes, WBDGDPDeflator
+from .constants import BACIColumnsTradeData, CountryCodes, WBDGDPDeflator, StorageFormat
+from .trade_data_loader import TradeDataLoader
 
 load_dotenv() # TODO: change dotenv
 
 
 class RawDataManager:
-    def __init__(self, year):
+    def __init__(
+            self,
+            year,
+            country_data: DataFrame | None = None,
+            gdp_deflator: DataFrame | None = None
+    ):
+        """
+        Args:
+            year: The year of the raw BACI file.
+            country_data (pd.DataFrame, optional): Already loaded BACI country codes, to avoid
+                reading them again for every year.
+            gdp_deflator (pd.DataFrame, optional): Already loaded GDP deflator table.
+        """
 
         self.year = year
 
-        self.transaction_data = pd.read_csv(
-            os.getenv("RAW_DATA_DIR") + f"BACI_HS92_Y{year}_V202401b.csv",
-            sep=","
-        )
+        self.transaction_file = os.getenv("RAW_DATA_DIR") + f"BACI_HS92_Y{year}_V202401b.csv"
 
-        self.country_data = pd.read_csv(
+        self.country_data = country_data if country_data is not None else self.load_country_data()
+
+        self.gdp_deflator = gdp_deflator if gdp_deflator is not None else self.load_gdp_deflator()
+
+    @staticmethod
+    def load_country_data() -> DataFrame:
+        return pd.read_csv(
             os.getenv("RAW_DATA_DIR") + "country_codes_V202401b.csv"
         )
 
-        # Countries location region
-        self.wbd_countries = pd.read_csv(os.getenv("WBD_COUNTRIES"))
-
+    @staticmethod
+    def load_gdp_deflator() -> DataFrame:
         # GDP deflator: linked series (base year varies by country), use dtype="string" to avoid unicodeerror
-        self.gdp_deflator = pd.read_csv(
+        return pd.read_csv(
             os.getenv("WBD_GDP_DEFLATOR"),
             dtype="string"
         )
 
+    @cached_property
+    def wbd_countries(self) -> DataFrame:
+        # Countries location region
+        return pd.read_csv(os.getenv("WBD_COUNTRIES"))
+
+    @cached_property
+    def transaction_data(self) -> DataFrame:
+        """
+        The whole raw BACI year, read on first access.
+        """
+        return pd.read_csv(self.transaction_file, sep=",")
+
+    def iter_transaction_data(self, chunksize: int) -> Iterator[DataFrame]:
+        """
+        Reads the raw BACI year in chunks of `chunksize` rows.
+        """
+        return pd.read_csv(self.transaction_file, sep=",", chunksize=chunksize)
+
 
 class GDPDataHandler:
     """
@@ -48,6 +85,33 @@ class GDPDataHandler:
         """
         self.df_gdp = df_gdp
         self.base_year = base_year
+        self.deflator_table = self._build_deflator_table(df_gdp)
+
+    @staticmethod
+    def _build_deflator_table(df_gdp: DataFrame) -> DataFrame:
+        """
+        Builds, once, a countries x years table of GDP deflators for direct lookups.
+
+        Args:
+        df_gdp (pd.DataFrame): DataFrame containing GDP data with columns 'countryiso3code', 'date', and 'value'.
+
+        Returns:
+        pd.DataFrame: GDP deflators indexed by country code, with one column per year (int).
+        """
+        deflators = pd.DataFrame({
+            WBDGDPDeflator.ISO_CODE_3.value: df_gdp[WBDGDPDeflator.ISO_CODE_3.value].astype(object),
+            WBDGDPDeflator.YEAR.value: pd.to_numeric(df_gdp[WBDGDPDeflator.YEAR.value], errors="coerce"),
+            WBDGDPDeflator.MONEY.value: pd.to_numeric(df_gdp[WBDGDPDeflator.MONEY.value], errors="coerce"),
+        }).dropna(subset=[WBDGDPDeflator.YEAR.value])
+        deflators = deflators.drop_duplicates(
+            subset=[WBDGDPDeflator.ISO_CODE_3.value, WBDGDPDeflator.YEAR.value], keep="first"
+        )
+        deflators[WBDGDPDeflator.YEAR.value] = deflators[WBDGDPDeflator.YEAR.value].astype(int)
+        return deflators.pivot(
+            index=WBDGDPDeflator.ISO_CODE_3.value,
+            columns=WBDGDPDeflator.YEAR.value,
+            values=WBDGDPDeflator.MONEY.value
+        )
 
     def get_gdp_linked(self, year, country="USA") -> float:
         """
@@ -60,36 +124,55 @@ class GDPDataHandler:
         Returns:
         float: The GDP deflator value, or 0.0 if no data is available.
         """
-        bool_mask = (self.df_gdp[WBDGDPDeflator.ISO_CODE_3.value] == country) & (
-                self.df_gdp[WBDGDPDeflator.YEAR.value] == str(year)
-        )
-        df_filtered = self.df_gdp[bool_mask]
-
-        if df_filtered.empty:
+        try:
+            gdp_linked = self.deflator_table.at[country, int(year)]
+        except KeyError:
             return 0.0
-        else:
-            return float(df_filtered[WBDGDPDeflator.MONEY.value].iloc[0])
+        return 0.0 if pd.isna(gdp_linked) else float(gdp_linked)
 
-    def to_constant_usd(self, df: DataFrame, year: str) -> DataFrame:
+    def get_gdp_linked_by_country(self, year) -> pd.Series:
+        """
+        Retrieves the GDP deflator of every country for a given year.
+
+        Args:
+        year (int): The year for which the GDP deflators are requested.
+
+        Returns:
+        pd.Series: GDP deflators indexed by country code; empty if the year has no data.
+        """
+        if int(year) not in self.deflator_table.columns:
+            return pd.Series(dtype=float)
+        return self.deflator_table[int(year)]
+
+    def to_constant_usd(self, df: DataFrame, year: str, country_column: str | None = None) -> DataFrame:
         """
         Converts the 'money' column of a DataFrame from current USD to constant USD using the GDP deflator.
 
         Args:
         df (pd.DataFrame): The DataFrame containing the 'Value' column to convert.
         year (int): The year for the GDP deflator to apply.
+        country_column (str, optional): Column with the country code whose deflator is applied to
+            each row. By default every row uses the USA deflator, since BACI values are in USD.
+            Rows of countries without deflator data become NaN.
 
         Returns:
         pd.DataFrame: The modified DataFrame with 'Value' in constant USD.
         """
-        gdp_linked = self.get_gdp_linked(year)
-        gdp_base = self.get_gdp_linked(self.base_year)
+        money = df[BACIColumnsTradeData.MONEY.value].astype(float)
+
+        if country_column is None:
+            gdp_linked = self.get_gdp_linked(year)
+            gdp_base = self.get_gdp_linked(self.base_year)
 
-        if gdp_linked == 0 or gdp_base == 0:
-            raise ValueError("GDP deflator is zero, which may indicate missing data.")
+            if gdp_linked == 0 or gdp_base == 0:
+                raise ValueError("GDP deflator is zero, which may indicate missing data.")
+        else:
+            # The deflators are looked up once per distinct country and broadcast to the rows
+            countries = df[country_column]
+            gdp_linked = countries.map(self.get_gdp_linked_by_country(year)).astype(float).replace(0.0, float("nan"))
+            gdp_base = countries.map(self.get_gdp_linked_by_country(self.base_year)).astype(float)
 
-        df[BACIColumnsTradeData.MONEY.value] = df[
-            BACIColumnsTradeData.MONEY.value
-        ].apply(lambda x: (float(x) / gdp_linked) * gdp_base * 100)
+        df[BACIColumnsTradeData.MONEY.value] = money / gdp_linked * gdp_base * 100
         return df
 
 
@@ -125,26 +208,63 @@ class DataCleaner:
         return transaction_data
 
     @staticmethod
-    def clean_trade_data():
+    def clean_trade_data_year(
+            year: str,
+            country_data: DataFrame,
+            gdp_deflator: DataFrame,
+            storage_format: StorageFormat = StorageFormat.PARQUET,
+            chunksize: int = 1_000_000
+    ) -> Path:
         """
-        TODO: use Parallel to optimize time execution
+        Limpia un año de BACI leyendo el archivo crudo por partes de `chunksize` filas.
+
+        Cada parte se normaliza, se convierte a USD constantes y se agrega al archivo limpio, de modo
+        que la memoria usada depende del tamaño de la parte y no del año completo.
+
+        Returns:
+            Path: La ruta del archivo limpio.
         """
-        years = [str(year) for year in range(1995, 2022 + 1)]
+        print("Processing year = ", year)
 
-        for year in years:
-            print("Processing year = ", year)
+        manager = RawDataManager(year, country_data=country_data, gdp_deflator=gdp_deflator)
+        gpd_handler = GDPDataHandler(manager.gdp_deflator, base_year="2013")
 
-            manager = RawDataManager(year)
+        with TradeDataLoader(os.getenv("cleaned_data_dir")).open_writer(int(year), storage_format) as writer:
+            for transaction_chunk in manager.iter_transaction_data(chunksize):
+                cleaned_data: DataFrame = DataCleaner.normalize_column_names(
+                    transaction_chunk, manager.country_data
+                )
+                writer.write(gpd_handler.to_constant_usd(cleaned_data, year))
 
-            cleaned_data: DataFrame = DataCleaner.normalize_column_names(
-                manager.transaction_data, manager.country_data
-            )
+        return writer.file_path
 
-            gpd_handler = GDPDataHandler(manager.gdp_deflator, base_year="2013")
-            data_corrected = gpd_handler.to_constant_usd(cleaned_data, year)
+    @staticmethod
+    def clean_trade_data(
+            storage_format: StorageFormat = StorageFormat.PARQUET,
+            years: list[str] | None = None,
+            n_jobs: int = -1,
+            chunksize: int = 1_000_000
+    ):
+        """
+        Limpia los datos crudos de BACI de cada año y los guarda en `cleaned_data_dir`.
 
-            data_corrected.to_csv(
-                os.getenv("cleaned_data_dir") + f"cleaned_HS92_Y{year}_V202401b.csv",
-                index=False
-            )
+        Los años se procesan en paralelo y cada uno se lee por partes (ver `clean_trade_data_year`).
+        Las tablas de países y del deflactor se cargan una sola vez para todos los años.
+
+        Args:
+            storage_format (StorageFormat): Formato de los archivos limpios. Por defecto Parquet,
+                que `TradeDataLoader` lee con proyección de columnas y filtros por row group.
+            years (list[str], optional): Años a limpiar. Por defecto de 1995 a 2022.
+            n_jobs (int): Número de procesos de joblib.
+            chunksize (int): Filas del archivo crudo procesadas a la vez en cada año.
+        """
+        years = years or [str(year) for year in range(1995, 2022 + 1)]
+        country_data = RawDataManager.load_country_data()
+        gdp_deflator = RawDataManager.load_gdp_deflator()
 
+        Parallel(n_jobs=n_jobs)(
+            delayed(DataCleaner.clean_trade_data_year)(
+                year, country_data, gdp_deflator, storage_format=storage_format, chunksize=chunksize
+            )
+            for year in years
+        )
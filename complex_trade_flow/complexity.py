@@ -0,0 +1,396 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+from scipy import sparse
+from scipy.sparse.linalg import eigsh
+
+from .constants import BACIColumnsTradeData
+from .trade_tensor import EXPORTER, PRODUCT
+
+if TYPE_CHECKING:
+    from .networks import TradeNetwork
+
+RCA_THRESHOLD = 1.0
+FITNESS_TOLERANCE = 1e-8
+FITNESS_MAX_ITERATIONS = 1000
+
+
+class ComplexityCalculator:
+    """
+    Computes the Economic Complexity Index (ECI) of entities and the Product Complexity Index (PCI)
+    of products, and the fitness and complexity of Tacchella et al., from the sparse entity x product
+    matrix of exports.
+    """
+
+    @staticmethod
+    def calculate_export_matrix(
+            data: DataFrame,
+            entity: str = BACIColumnsTradeData.EXPORTER_ISO_CODE_3.value,
+            product: str = BACIColumnsTradeData.PRODUCT_CATEGORY_CODE.value,
+            column: str = BACIColumnsTradeData.MONEY.value
+    ) -> tuple[sparse.csr_matrix, pd.Index, pd.Index]:
+        """
+        Builds the sparse entity x product export matrix from long trade data.
+
+        Args:
+            data (DataFrame): The trade data DataFrame.
+            entity (str): Column identifying the exporting entities.
+            product (str): Column identifying the products.
+            column (str): Column with the exported values.
+
+        Returns:
+            tuple[sparse.csr_matrix, pd.Index, pd.Index]: The export matrix (repeated pairs summed)
+            and the labels of its rows and columns. Rows with a missing entity or product are dropped.
+        """
+        entity_codes, entities = pd.factorize(data[entity], sort=True)
+        product_codes, products = pd.factorize(data[product], sort=True)
+        valid = (entity_codes >= 0) & (product_codes >= 0)
+        exports = sparse.coo_matrix(
+            (data[column].to_numpy(dtype=np.float64)[valid], (entity_codes[valid], product_codes[valid])),
+            shape=(len(entities), len(products))
+        ).tocsr()
+        return exports, pd.Index(entities), pd.Index(products)
+
+    @staticmethod
+    def calculate_export_matrix_by_entity(
+            trade_network: TradeNetwork,
+            scheme_name: str,
+            column: str = BACIColumnsTradeData.MONEY.value
+    ) -> tuple[sparse.csr_matrix, pd.Index, pd.Index]:
+        """
+        Builds the entity x product export matrix of a classification scheme from the network's
+        trade tensor, aggregating the country rows into entities with a sparse indicator matrix.
+
+        Args:
+            trade_network (TradeNetwork): The trade network with the scheme applied.
+            scheme_name (str): The classification scheme name.
+            column (str): The tensor values to use ("money" or "mass").
+
+        Returns:
+            tuple[sparse.csr_matrix, pd.Index, pd.Index]: The export matrix and the labels of its
+            rows (entities) and columns (products). Countries without an entity are dropped.
+        """
+        tensor = trade_network.trade_tensor()
+        countries = tensor.labels[EXPORTER]
+        country_entities = pd.Series(trade_network.classified_countries[scheme_name]).reindex(countries)
+        entity_codes, entities = pd.factorize(country_entities, sort=True)
+        classified = np.flatnonzero(entity_codes >= 0)
+        country_to_entity = sparse.csr_matrix(
+            (np.ones(len(classified)), (entity_codes[classified], classified)),
+            shape=(len(entities), len(countries))
+        )
+        exports = country_to_entity @ tensor.matrix(EXPORTER, PRODUCT, column)
+        return exports.tocsr(), pd.Index(entities), tensor.labels[PRODUCT]
+
+    @staticmethod
+    def calculate_rca_matrix(exports: sparse.spmatrix) -> sparse.csr_matrix:
+        """
+        Calculates the Balassa revealed comparative advantage of every non-zero export:
+
+        RCA_cp = (X_cp / X_c) / (X_p / X)
+
+        Args:
+            exports (sparse.spmatrix): The entity x product export matrix.
+
+        Returns:
+            sparse.csr_matrix: The RCA matrix, with the same sparsity pattern as the exports.
+        """
+        rca = sparse.coo_matrix(exports, dtype=np.float64, copy=True)
+        entity_totals = np.bincount(rca.row, weights=rca.data, minlength=rca.shape[0])
+        product_totals = np.bincount(rca.col, weights=rca.data, minlength=rca.shape[1])
+        rca.data = rca.data * entity_totals.sum() / (entity_totals[rca.row] * product_totals[rca.col])
+        rca = rca.tocsr()
+        rca.eliminate_zeros()
+        return rca
+
+    @staticmethod
+    def calculate_specialization_matrix(
+            exports: sparse.spmatrix,
+            threshold: float = RCA_THRESHOLD
+    ) -> sparse.csr_matrix:
+        """
+        Calculates the binary matrix M_cp = 1 if RCA_cp >= threshold, else 0.
+        """
+        specialization = ComplexityCalculator.calculate_rca_matrix(exports)
+        specialization.data = (specialization.data >= threshold).astype(np.float64)
+        specialization.eliminate_zeros()
+        return specialization
+
+    @staticmethod
+    def calculate_complexity_indexes(specialization: sparse.spmatrix) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Calculates ECI and PCI from the binary specialization matrix M.
+
+        The ECI is the eigenvector of the second largest eigenvalue of D_c^-1 M D_p^-1 M^T, where D_c
+        and D_p hold the diversity and ubiquity. It is obtained with a sparse eigensolver from the
+        symmetric matrix S = D_c^-1/2 M D_p^-1 M^T D_c^-1/2, which has the same eigenvalues; the
+        PCI is the average ECI eigenvector of the exporters of each product. Both are standardized
+        and the sign is chosen so that the ECI is positively correlated with diversity.
+
+        Args:
+            specialization (sparse.spmatrix): The binary entity x product matrix M.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: ECI per row and PCI per column; NaN for entities without
+            any specialization and for products no entity is specialized in.
+        """
+        specialization = sparse.csr_matrix(specialization, dtype=np.float64)
+        diversity = np.asarray(specialization.sum(axis=1)).ravel()
+        ubiquity = np.asarray(specialization.sum(axis=0)).ravel()
+        eci = np.full(specialization.shape[0], np.nan)
+        pci = np.full(specialization.shape[1], np.nan)
+
+        entities, products = np.flatnonzero(diversity > 0), np.flatnonzero(ubiquity > 0)
+        if len(entities) < 2:
+            return eci, pci
+        specialization = specialization[entities][:, products]
+        diversity, ubiquity = diversity[entities], ubiquity[products]
+
+        normalized = (
+            sparse.diags(1 / np.sqrt(diversity)) @ specialization @ sparse.diags(1 / np.sqrt(ubiquity))
+        )
+        symmetric = (normalized @ normalized.T).tocsr()
+        if len(entities) > 2:
+            eigenvalues, eigenvectors = eigsh(symmetric, k=2, which="LA", v0=np.ones(len(entities)))
+        else:
+            eigenvalues, eigenvectors = np.linalg.eigh(symmetric.toarray())
+        entity_vector = eigenvectors[:, np.argsort(eigenvalues)[-2]] / np.sqrt(diversity)
+        product_vector = (specialization.T @ entity_vector) / ubiquity
+
+        if np.corrcoef(entity_vector, diversity)[0, 1] < 0:
+            entity_vector, product_vector = -entity_vector, -product_vector
+        eci[entities] = (entity_vector - entity_vector.mean()) / entity_vector.std()
+        pci[products] = (product_vector - product_vector.mean()) / product_vector.std()
+        return eci, pci
+
+    @staticmethod
+    def calculate_fitness_complexity(
+            specialization: sparse.spmatrix,
+            initial_fitness: np.ndarray | None = None,
+            initial_complexity: np.ndarray | None = None,
+            tolerance: float = FITNESS_TOLERANCE,
+            max_iterations: int = FITNESS_MAX_ITERATIONS
+    ) -> tuple[np.ndarray, np.ndarray, int]:
+        """
+        Calculates the fitness of entities and the complexity of products (Tacchella et al., 2012)
+        from the binary specialization matrix M with the fixed-point iteration
+
+        F_c = sum_p M_cp Q_p,    Q_p = 1 / sum_c (M_cp / F_c)
+
+        where both vectors are normalized to mean 1 after every step. Each step is two sparse
+        matrix-vector products.
+
+        Args:
+            specialization (sparse.spmatrix): The binary entity x product matrix M.
+            initial_fitness (np.ndarray, optional): Starting fitness per row, e.g. the solution of the
+                previous year. Missing or non-positive values start at 1.
+            initial_complexity (np.ndarray, optional): Starting complexity per column.
+            tolerance (float): The iteration stops when no value changes more than this.
+            max_iterations (int): Maximum number of iterations.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray, int]: Fitness per row, complexity per column (NaN for entities
+            and products without any specialization) and the number of iterations run.
+        """
+        specialization = sparse.csr_matrix(specialization, dtype=np.float64)
+        diversity = np.asarray(specialization.sum(axis=1)).ravel()
+        ubiquity = np.asarray(specialization.sum(axis=0)).ravel()
+        entities, products = np.flatnonzero(diversity > 0), np.flatnonzero(ubiquity > 0)
+        specialization = specialization[entities][:, products]
+        transposed = specialization.T.tocsr()
+
+        def starting_point(initial_values, positions):
+            if initial_values is None:
+                return np.ones(len(positions))
+            values = np.asarray(initial_values, dtype=np.float64)[positions]
+            values = np.where(values > 0, values, 1.0)
+            return values / values.mean()
+
+        fitness = starting_point(initial_fitness, entities)
+        complexity = starting_point(initial_complexity, products)
+        iterations = 0
+        with np.errstate(divide="ignore"):
+            while iterations < max_iterations and len(entities) > 0:
+                iterations += 1
+                new_fitness = specialization @ complexity
+                new_complexity = 1 / (transposed @ (1 / fitness))
+                new_fitness /= new_fitness.mean()
+                new_complexity /= new_complexity.mean()
+                converged = (
+                    np.abs(new_fitness - fitness).max() < tolerance
+                    and np.abs(new_complexity - complexity).max() < tolerance
+                )
+                fitness, complexity = new_fitness, new_complexity
+                if converged:
+                    break
+
+        entity_fitness = np.full(len(diversity), np.nan)
+        product_complexity = np.full(len(ubiquity), np.nan)
+        entity_fitness[entities] = fitness
+        product_complexity[products] = complexity
+        return entity_fitness, product_complexity, iterations
+
+    @staticmethod
+    def calculate_fitness_complexity_by_entity(
+            trade_network: TradeNetwork,
+            scheme_name: str,
+            column: str = BACIColumnsTradeData.MONEY.value,
+            initial_fitness: pd.Series | None = None,
+            initial_complexity: pd.Series | None = None,
+            threshold: float = RCA_THRESHOLD,
+            tolerance: float = FITNESS_TOLERANCE,
+            max_iterations: int = FITNESS_MAX_ITERATIONS
+    ) -> tuple[DataFrame, DataFrame]:
+        """
+        Calculates the fitness of every entity of a classification scheme and the complexity of
+        every product. See `calculate_fitness_complexity`.
+
+        Args:
+            trade_network (TradeNetwork): The trade network with the scheme applied.
+            scheme_name (str): The classification scheme name.
+            column (str): The exported values to use.
+            initial_fitness (pd.Series, optional): Starting fitness indexed by entity, e.g. the
+                previous year's result; it is aligned by label.
+            initial_complexity (pd.Series, optional): Starting complexity indexed by product.
+            threshold (float): The RCA threshold of the specialization matrix.
+            tolerance (float): See `calculate_fitness_complexity`.
+            max_iterations (int): See `calculate_fitness_complexity`.
+
+        Returns:
+            tuple[DataFrame, DataFrame]: One row per entity with columns `scheme_name` and `FITNESS`,
+            and one row per product with columns `product_category_code` and `COMPLEXITY`. The number
+            of iterations run is stored in `attrs["iterations"]` of the first.
+        """
+        exports, entities, products = ComplexityCalculator.calculate_export_matrix_by_entity(
+            trade_network, scheme_name, column
+        )
+        fitness, complexity, iterations = ComplexityCalculator.calculate_fitness_complexity(
+            ComplexityCalculator.calculate_specialization_matrix(exports, threshold),
+            initial_fitness=None if initial_fitness is None else initial_fitness.reindex(entities).to_numpy(),
+            initial_complexity=None if initial_complexity is None else initial_complexity.reindex(products).to_numpy(),
+            tolerance=tolerance,
+            max_iterations=max_iterations
+        )
+        all_entities = list(trade_network.entities[scheme_name])
+        entity_fitness = DataFrame({
+            scheme_name: all_entities,
+            "FITNESS": pd.Series(fitness, index=entities).reindex(all_entities).to_numpy(),
+        })
+        entity_fitness.attrs["iterations"] = iterations
+        product_complexity = DataFrame({
+            BACIColumnsTradeData.PRODUCT_CATEGORY_CODE.value: products,
+            "COMPLEXITY": complexity,
+        })
+        return entity_fitness, product_complexity
+
+    @staticmethod
+    def calculate_complexity(
+            exports: sparse.spmatrix,
+            entities: pd.Index,
+            products: pd.Index,
+            threshold: float = RCA_THRESHOLD
+    ) -> tuple[DataFrame, DataFrame]:
+        """
+        Calculates ECI and PCI from an export matrix.
+
+        Args:
+            exports (sparse.spmatrix): The entity x product export matrix.
+            entities (pd.Index): The labels of the rows.
+            products (pd.Index): The labels of the columns.
+            threshold (float): The RCA threshold of the specialization matrix.
+
+        Returns:
+            tuple[DataFrame, DataFrame]: Indexed by entity, the columns `DIVERSITY` and `ECI`; indexed
+            by product, the columns `UBIQUITY` and `PCI`.
+        """
+        specialization = ComplexityCalculator.calculate_specialization_matrix(exports, threshold)
+        eci, pci = ComplexityCalculator.calculate_complexity_indexes(specialization)
+        return (
+            DataFrame({"DIVERSITY": np.asarray(specialization.sum(axis=1)).ravel(), "ECI": eci}, index=entities),
+            DataFrame({"UBIQUITY": np.asarray(specialization.sum(axis=0)).ravel(), "PCI": pci}, index=products),
+        )
+
+    @staticmethod
+    def calculate_complexity_by_entity(
+            trade_network: TradeNetwork,
+            scheme_name: str,
+            column: str = BACIColumnsTradeData.MONEY.value
+    ) -> DataFrame:
+        """
+        Calculates the diversity and ECI of every entity of a classification scheme.
+
+        Args:
+            trade_network (TradeNetwork): The trade network with the scheme applied.
+            scheme_name (str): The classification scheme name.
+            column (str): The exported values to use.
+
+        Returns:
+            DataFrame: One row per entity, with columns `scheme_name`, `DIVERSITY` and `ECI`.
+        """
+        entity_complexity, _ = ComplexityCalculator.calculate_complexity(
+            *ComplexityCalculator.calculate_export_matrix_by_entity(trade_network, scheme_name, column)
+        )
+        entities = list(trade_network.entities[scheme_name])
+        entity_complexity = entity_complexity.reindex(entities)
+        entity_complexity.insert(0, scheme_name, entities)
+        return entity_complexity.reset_index(drop=True)
+
+    @staticmethod
+    def calculate_product_complexity(
+            trade_network: TradeNetwork,
+            scheme_name: str,
+            column: str = BACIColumnsTradeData.MONEY.value
+    ) -> DataFrame:
+        """
+        Calculates the ubiquity and PCI of every product, with the entities of a classification scheme.
+
+        Returns:
+            DataFrame: One row per product, with columns `product_category_code`, `UBIQUITY` and `PCI`.
+        """
+        _, product_complexity = ComplexityCalculator.calculate_complexity(
+            *ComplexityCalculator.calculate_export_matrix_by_entity(trade_network, scheme_name, column)
+        )
+        return product_complexity.rename_axis(BACIColumnsTradeData.PRODUCT_CATEGORY_CODE.value).reset_index()
+
+    @staticmethod
+    def calculate_complexity_panel(
+            panel: DataFrame,
+            entity: str = BACIColumnsTradeData.EXPORTER_ISO_CODE_3.value,
+            product: str = BACIColumnsTradeData.PRODUCT_CATEGORY_CODE.value,
+            column: str = BACIColumnsTradeData.MONEY.value,
+            threshold: float = RCA_THRESHOLD
+    ) -> tuple[DataFrame, DataFrame]:
+        """
+        Calculates ECI and PCI for every year of a panel (see `TradeDataLoader.load_panel`).
+
+        Args:
+            panel (DataFrame): Trade data of several years, with a `year` column.
+            entity (str): Column identifying the exporting entities.
+            product (str): Column identifying the products.
+            column (str): Column with the exported values.
+            threshold (float): The RCA threshold of the specialization matrix.
+
+        Returns:
+            tuple[DataFrame, DataFrame]: The entity results (`year`, entity, `DIVERSITY`, `ECI`) and the
+            product results (`year`, product, `UBIQUITY`, `PCI`) of every year.
+        """
+        entity_results, product_results = [], []
+        for year, year_data in panel.groupby(BACIColumnsTradeData.YEAR.value, sort=True):
+            exports, entities, products = ComplexityCalculator.calculate_export_matrix(
+                year_data, entity=entity, product=product, column=column
+            )
+            entity_complexity, product_complexity = ComplexityCalculator.calculate_complexity(
+                exports, entities, products, threshold
+            )
+            entity_results.append(entity_complexity.rename_axis(entity).reset_index().assign(year=year))
+            product_results.append(product_complexity.rename_axis(product).reset_index().assign(year=year))
+
+        def by_year(results):
+            results = pd.concat(results, ignore_index=True)
+            return results[[BACIColumnsTradeData.YEAR.value] + list(results.columns[:-1])]
+
+        return by_year(entity_results), by_year(product_results)
@@ -4,6 +4,13 @@ from enum import Enum
 class EconomicComplexity(Enum):
     ENTITY_PRODUCT_DIVERSIFICATION = "compute_entity_product_diversification"
     ENTITY_TRADE_METRICS = "compute_entity_trade_metrics"
+    ECONOMIC_COMPLEXITY_INDEX = "compute_economic_complexity_index"
+    FITNESS_COMPLEXITY = "compute_fitness_complexity"
+
+
+class StorageFormat(Enum):
+    PARQUET = "parquet"
+    CSV = "csv"
 
 
 class BACIColumnsTradeData(Enum):
@@ -34,3 +41,11 @@ class WBDGDPDeflator(Enum):
     ISO_CODE_3 = "countryiso3code"
     YEAR = "date"  # date only have year
     MONEY = "value"  # TODO validate money in USD?
+
+
+class WBDIndicator(Enum):
+    ISO_CODE_3 = "countryiso3code"
+    YEAR = "date"
+    VALUE = "value"
+    PROPENSITY = "NE.IMP.GNFS.ZS"  # Imports of goods and services (% of GDP)
+    INCOME = "NY.GDP.MKTP.CD"  # GDP (current US$)
@@ -1,9 +1,21 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Sequence
+
 import numpy as np
-from scipy import stats
-from pandas import DataFrame
+import pandas as pd
+from scipy import special, stats
+from pandas import DataFrame, Series
 
 from .constants import BACIColumnsTradeData
 
+if TYPE_CHECKING:
+    from .networks import TradeNetwork
+
+DEFAULT_HILL_ORDERS = (0.0, 1.0, 2.0, np.inf)
+# Elementos (réplicas x filas) que se sortean a la vez en el bootstrap; acota la memoria de cada bloque
+BOOTSTRAP_CHUNK_ELEMENTS = 2 ** 24
+
 
 class DiversityCalculator:
 
@@ -45,3 +57,346 @@ class DiversityCalculator:
             column=column
         )
         return 2 ** stats.entropy(probabilities, base=2)
+
+    @staticmethod
+    def calculate_marginal_probabilities_by_group(
+            group: str,
+            category: str,
+            data: DataFrame,
+            column: str
+    ) -> DataFrame:
+        """
+        Calculates the marginal probabilities of a category for every group at once.
+
+        Args:
+            group (str): Column identifying the groups (e.g. the exporter entity).
+            category (str): The name of the category column in the trade data.
+            data (DataFrame): The trade data DataFrame.
+            column (str): Column name used to get the distribution
+
+        Returns:
+            DataFrame: A groups x categories matrix whose rows are probability distributions.
+        """
+        distribution = data.groupby([group, category], observed=True, dropna=False)[column].sum().unstack(fill_value=0)
+        return distribution.div(distribution.sum(axis=1), axis=0)
+
+    @staticmethod
+    def calculate_diversity_index_by_group(
+            data: DataFrame,
+            group: str,
+            category: str = BACIColumnsTradeData.PRODUCT_CATEGORY_CODE.value,
+            column: str = BACIColumnsTradeData.MONEY.value
+    ) -> Series:
+        """
+        Calculates `calculate_diversity_index` for every group of the data in one pass.
+
+        Args:
+            data (DataFrame): The trade data DataFrame.
+            group (str): Column identifying the groups.
+            category (str): The name of the category column in the trade data.
+            column (str): Column name used to get the distribution
+
+        Returns:
+            Series: diversity index by group.
+        """
+        probabilities = DiversityCalculator.calculate_marginal_probabilities_by_group(
+            group=group,
+            category=category,
+            data=data,
+            column=column
+        )
+        return Series(
+            2 ** stats.entropy(probabilities.to_numpy(), base=2, axis=1),
+            index=probabilities.index
+        )
+
+    @staticmethod
+    def calculate_diversity_index_by_entity(
+            trade_network: TradeNetwork,
+            scheme_name: str,
+            category: str = BACIColumnsTradeData.PRODUCT_CATEGORY_CODE.value,
+            column: str = BACIColumnsTradeData.MONEY.value
+    ) -> DataFrame:
+        """
+        Calculates the export and import diversity index of every entity of a classification scheme.
+
+        Equivalent to calling `calculate_diversity_index` on
+        `trade_network.filter_data_by_entities(scheme_name, exporters=[entity])` (and `importers=[entity]`)
+        for each entity, but with a single groupby per direction.
+
+        Args:
+            trade_network (TradeNetwork): The trade network with the scheme applied.
+            scheme_name (str): The name of the classification scheme.
+            category (str): The name of the category column in the trade data.
+            column (str): Column name used to get the distribution
+
+        Returns:
+            DataFrame: Indexed by entity, with columns `export_diversity` and `import_diversity`.
+            Entities without trade get 1.0, as in the per-entity path.
+        """
+        data = trade_network.filter_data_by_entities(scheme_name=scheme_name, decode=False)
+        entities = list(trade_network.entities[scheme_name])
+
+        diversity = {}
+        for direction in ("export", "import"):
+            diversity_by_group = DiversityCalculator.calculate_diversity_index_by_group(
+                data=data,
+                group=f"{scheme_name}_{direction}er",
+                category=category,
+                column=column
+            )
+            diversity_by_group.index = trade_network.decode_entities(scheme_name, diversity_by_group.index)
+            diversity[f"{direction}_diversity"] = diversity_by_group.reindex(entities, fill_value=1.0)
+        return DataFrame(diversity, index=entities)
+
+    @staticmethod
+    def calculate_hill_numbers(probabilities: np.ndarray, orders: Sequence[float] = DEFAULT_HILL_ORDERS) -> np.ndarray:
+        """
+        Calculates the Hill numbers (effective number of categories) of several orders for every row
+        of a probability matrix.
+
+        D_q = (sum_i p_i ** q) ** (1 / (1 - q)), computed in log space from a single `log p`:
+        - q = 0: richness (number of categories with p > 0)
+        - q = 1: exp(entropy), the same value as `calculate_diversity_index`
+        - q = 2: inverse Simpson index
+        - q = inf: 1 / max(p)
+
+        Args:
+            probabilities (np.ndarray): A groups x categories matrix whose rows sum to 1.
+            orders (Sequence[float]): The orders q of the profile.
+
+        Returns:
+            np.ndarray: A groups x orders matrix. Rows without a distribution (NaN or all zeros) give
+            NaN for every order; zero probabilities within a row are ignored.
+        """
+        probabilities = np.asarray(probabilities, dtype=np.float64)
+        present = probabilities > 0
+        with np.errstate(divide="ignore"):
+            log_probabilities = np.where(present, np.log(probabilities), -np.inf)
+        undefined = np.isnan(probabilities).any(axis=1) | ~present.any(axis=1)
+
+        hill_numbers = np.empty((probabilities.shape[0], len(orders)))
+        for position, order in enumerate(orders):
+            if order == 0:
+                with np.errstate(divide="ignore"):
+                    log_hill_number = np.log(present.sum(axis=1))
+            elif order == 1:
+                log_hill_number = -np.sum(probabilities * np.where(present, log_probabilities, 0.0), axis=1)
+            elif np.isinf(order):
+                log_hill_number = -log_probabilities.max(axis=1)
+            else:
+                log_hill_number = special.logsumexp(
+                    np.where(present, order * log_probabilities, -np.inf), axis=1
+                ) / (1 - order)
+            hill_numbers[:, position] = np.exp(log_hill_number)
+        hill_numbers[undefined] = np.nan
+        return hill_numbers
+
+    @staticmethod
+    def calculate_diversity_profile_by_group(
+            data: DataFrame,
+            group: str,
+            orders: Sequence[float] = DEFAULT_HILL_ORDERS,
+            category: str = BACIColumnsTradeData.PRODUCT_CATEGORY_CODE.value,
+            column: str = BACIColumnsTradeData.MONEY.value
+    ) -> DataFrame:
+        """
+        Calculates the Hill numbers of several orders for every group of the data in one pass.
+
+        The marginal probabilities are computed once and shared by every order.
+
+        Args:
+            data (DataFrame): The trade data DataFrame.
+            group (str): Column identifying the groups.
+            orders (Sequence[float]): The orders q of the profile.
+            category (str): The name of the category column in the trade data.
+            column (str): Column name used to get the distribution
+
+        Returns:
+            DataFrame: Indexed by group, one column per order.
+        """
+        probabilities = DiversityCalculator.calculate_marginal_probabilities_by_group(
+            group=group,
+            category=category,
+            data=data,
+            column=column
+        )
+        return DataFrame(
+            DiversityCalculator.calculate_hill_numbers(probabilities.to_numpy(), orders),
+            index=probabilities.index,
+            columns=list(orders)
+        )
+
+    @staticmethod
+    def calculate_diversity_profile_by_entity(
+            trade_network: TradeNetwork,
+            scheme_name: str,
+            direction: str = "export",
+            orders: Sequence[float] = DEFAULT_HILL_ORDERS,
+            category: str = BACIColumnsTradeData.PRODUCT_CATEGORY_CODE.value,
+            column: str = BACIColumnsTradeData.MONEY.value
+    ) -> DataFrame:
+        """
+        Calculates the export or import diversity profile of every entity of a classification scheme.
+
+        Args:
+            trade_network (TradeNetwork): The trade network with the scheme applied.
+            scheme_name (str): The name of the classification scheme.
+            direction (str): "export" or "import".
+            orders (Sequence[float]): The orders q of the profile.
+            category (str): The name of the category column in the trade data.
+            column (str): Column name used to get the distribution
+
+        Returns:
+            DataFrame: Indexed by entity, one column per order. Entities without trade get NaN.
+        """
+        data = trade_network.filter_data_by_entities(scheme_name=scheme_name, decode=False)
+        profile = DiversityCalculator.calculate_diversity_profile_by_group(
+            data=data,
+            group=f"{scheme_name}_{direction}er",
+            orders=orders,
+            category=category,
+            column=column
+        )
+        profile.index = trade_network.decode_entities(scheme_name, profile.index)
+        return profile.reindex(list(trade_network.entities[scheme_name]))
+
+    @staticmethod
+    def _entropy_by_group(pair_values: np.ndarray, group_offsets: np.ndarray) -> np.ndarray:
+        """
+        Calculates the entropy (in nats) of every group from the summed values of its (group, category)
+        pairs, stored contiguously by group along the last axis.
+
+        H = log(T) - sum(x log x) / T, where T is the group total.
+        """
+        with np.errstate(divide="ignore", invalid="ignore"):
+            x_log_x = np.where(pair_values > 0, pair_values * np.log(pair_values), 0.0)
+            totals = np.add.reduceat(pair_values, group_offsets, axis=-1)
+            return np.log(totals) - np.add.reduceat(x_log_x, group_offsets, axis=-1) / totals
+
+    @staticmethod
+    def bootstrap_diversity_index_by_group(
+            data: DataFrame,
+            group: str,
+            category: str = BACIColumnsTradeData.PRODUCT_CATEGORY_CODE.value,
+            column: str = BACIColumnsTradeData.MONEY.value,
+            n_replicates: int = 1000,
+            confidence: float = 0.95,
+            resampling: str = "multinomial",
+            seed: int | np.random.Generator | None = None,
+            chunk_size: int | None = None
+    ) -> DataFrame:
+        """
+        Calculates bootstrap confidence intervals of `calculate_diversity_index` for every group.
+
+        The rows (flows) of each group are resampled and the diversity index of every replicate and
+        group is computed in a batched pass: the resampled values are summed by (replicate, group,
+        category) with a single `bincount` and reduced to entropies with `reduceat`.
+
+        Args:
+            data (DataFrame): The trade data DataFrame.
+            group (str): Column identifying the groups.
+            category (str): The name of the category column in the trade data.
+            column (str): Column name used to get the distribution
+            n_replicates (int): Number of bootstrap replicates.
+            confidence (float): Confidence level of the percentile intervals.
+            resampling (str): "multinomial" draws each group's rows with replacement; "poisson" weights
+                every row with an independent Poisson(1) count.
+            seed (int | np.random.Generator | None): Seed or generator, for reproducible intervals.
+            chunk_size (int | None): Replicates drawn at a time. By default as many as fit in
+                `BOOTSTRAP_CHUNK_ELEMENTS` sampled rows.
+
+        Returns:
+            DataFrame: Indexed by group, with columns `diversity` (the point estimate), `ci_lower`,
+            `ci_upper` and `standard_error`.
+        """
+        if resampling not in ("multinomial", "poisson"):
+            raise ValueError(f"Unknown resampling method: {resampling}")
+
+        group_codes, groups = pd.factorize(data[group], use_na_sentinel=False)
+        category_codes, _ = pd.factorize(data[category], use_na_sentinel=False)
+        values = data[column].to_numpy(dtype=np.float64)
+        columns = ["diversity", "ci_lower", "ci_upper", "standard_error"]
+        if len(values) == 0:
+            return DataFrame(columns=columns, index=groups, dtype=np.float64)
+
+        # Filas ordenadas por (grupo, categoría): cada par y cada grupo ocupa un bloque contiguo
+        order = np.lexsort((category_codes, group_codes))
+        group_codes, category_codes, values = group_codes[order], category_codes[order], values[order]
+        new_pair = np.r_[True, (np.diff(group_codes) != 0) | (np.diff(category_codes) != 0)]
+        pair_codes = np.cumsum(new_pair) - 1
+        n_pairs = pair_codes[-1] + 1
+        group_pair_offsets = np.searchsorted(group_codes[new_pair], np.arange(len(groups)))
+        group_row_offsets = np.searchsorted(group_codes, np.arange(len(groups)))
+        row_group_offsets = group_row_offsets[group_codes]
+        row_group_sizes = np.bincount(group_codes, minlength=len(groups))[group_codes]
+
+        diversity = np.exp(DiversityCalculator._entropy_by_group(
+            np.bincount(pair_codes, weights=values, minlength=n_pairs), group_pair_offsets
+        ))
+
+        rng = np.random.default_rng(seed)
+        chunk_size = chunk_size or max(1, BOOTSTRAP_CHUNK_ELEMENTS // len(values))
+        replicates = np.empty((n_replicates, len(groups)))
+        for start in range(0, n_replicates, chunk_size):
+            size = min(chunk_size, n_replicates - start)
+            if resampling == "multinomial":
+                rows = row_group_offsets + (rng.random((size, len(values))) * row_group_sizes).astype(np.int64)
+                weights, pairs = values[rows], pair_codes[rows]
+            else:
+                weights, pairs = rng.poisson(1.0, (size, len(values))) * values, pair_codes
+            keys = np.arange(size)[:, None] * n_pairs + pairs
+            pair_values = np.bincount(
+                keys.ravel(), weights=weights.ravel(), minlength=size * n_pairs
+            ).reshape(size, n_pairs)
+            replicates[start:start + size] = np.exp(
+                DiversityCalculator._entropy_by_group(pair_values, group_pair_offsets)
+            )
+
+        alpha = (1 - confidence) / 2
+        ci_lower, ci_upper = np.nanquantile(replicates, [alpha, 1 - alpha], axis=0)
+        return DataFrame(
+            {
+                "diversity": diversity,
+                "ci_lower": ci_lower,
+                "ci_upper": ci_upper,
+                "standard_error": np.nanstd(replicates, axis=0, ddof=1),
+            },
+            index=groups
+        )
+
+    @staticmethod
+    def bootstrap_diversity_index_by_entity(
+            trade_network: TradeNetwork,
+            scheme_name: str,
+            direction: str = "export",
+            category: str = BACIColumnsTradeData.PRODUCT_CATEGORY_CODE.value,
+            column: str = BACIColumnsTradeData.MONEY.value,
+            **bootstrap_options
+    ) -> DataFrame:
+        """
+        Calculates bootstrap confidence intervals of the export or import diversity of every entity.
+
+        Args:
+            trade_network (TradeNetwork): The trade network with the scheme applied.
+            scheme_name (str): The name of the classification scheme.
+            direction (str): "export" or "import".
+            category (str): The name of the category column in the trade data.
+            column (str): Column name used to get the distribution
+            **bootstrap_options: Options of `bootstrap_diversity_index_by_group` (n_replicates,
+                confidence, resampling, seed, chunk_size).
+
+        Returns:
+            DataFrame: Indexed by entity, as in `bootstrap_diversity_index_by_group`. Entities without
+            trade get NaN.
+        """
+        data = trade_network.filter_data_by_entities(scheme_name=scheme_name, decode=False)
+        intervals = DiversityCalculator.bootstrap_diversity_index_by_group(
+            data=data,
+            group=f"{scheme_name}_{direction}er",
+            category=category,
+            column=column,
+            **bootstrap_options
+        )
+        intervals.index = trade_network.decode_entities(scheme_name, intervals.index)
+        return intervals.reindex(list(trade_network.entities[scheme_name]))
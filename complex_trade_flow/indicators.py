@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+
+from .constants import WBDIndicator
+from .trade_graph import INCOME, PROPENSITY
+
+if TYPE_CHECKING:
+    from .trade_graph import TradeGraph
+
+# Atributo de nodo -> código del indicador del Banco Mundial
+DEFAULT_INDICATORS = {
+    PROPENSITY: WBDIndicator.PROPENSITY.value,
+    INCOME: WBDIndicator.INCOME.value,
+}
+
+
+class IndicatorStore:
+    """
+    Indicadores del Banco Mundial guardados localmente, un archivo CSV por indicador con las columnas
+    countryiso3code, date y value (formato de la API del Banco Mundial).
+
+    Todos los indicadores se cargan una sola vez en un arreglo (país, año, indicador); obtener los
+    valores de un año para un conjunto de países es una indexación vectorizada.
+    """
+
+    def __init__(
+            self,
+            directory: str,
+            file_pattern: str = "{indicator}_1995-2022.csv",
+            indicators: dict[str, str] | None = None
+    ):
+        """
+        Args:
+            directory (str): Directorio de los archivos de indicadores.
+            file_pattern (str): Nombre de los archivos; `{indicator}` se reemplaza por el código.
+            indicators (dict[str, str], optional): Nombre del atributo -> código del indicador. Por
+                defecto la propensión a importar y el ingreso (`DEFAULT_INDICATORS`).
+        """
+        self.directory = Path(directory)
+        self.indicators = indicators or DEFAULT_INDICATORS
+        self.file_pattern = file_pattern
+        self.countries, self.years, self.values = self._load_indicators()
+
+    def get_file_path(self, indicator: str) -> Path:
+        return self.directory / self.file_pattern.format(indicator=indicator)
+
+    def _read_indicator(self, indicator: str) -> pd.DataFrame:
+        """
+        Lee el archivo de un indicador. Los agregados regionales no tienen ISO3 y se descartan; si un
+        país-año se repite se conserva el primero.
+        """
+        iso_code, year, value = WBDIndicator.ISO_CODE_3.value, WBDIndicator.YEAR.value, WBDIndicator.VALUE.value
+        data = pd.read_csv(self.get_file_path(indicator), usecols=[iso_code, year, value])
+        return data.dropna().drop_duplicates([iso_code, year])
+
+    def _load_indicators(self) -> tuple[pd.Index, pd.Index, np.ndarray]:
+        """
+        Lee cada archivo una vez y arma el arreglo (país, año, indicador); los datos faltantes son NaN.
+        """
+        iso_code, year, value = WBDIndicator.ISO_CODE_3.value, WBDIndicator.YEAR.value, WBDIndicator.VALUE.value
+        indicator_data = [self._read_indicator(indicator) for indicator in self.indicators.values()]
+
+        countries = pd.Index(pd.concat([data[iso_code] for data in indicator_data]).unique(), name=iso_code).sort_values()
+        years = pd.Index(pd.concat([data[year] for data in indicator_data]).unique()).sort_values()
+        values = np.full((len(countries), len(years), len(indicator_data)), np.nan)
+        for position, data in enumerate(indicator_data):
+            values[countries.get_indexer(data[iso_code]), years.get_indexer(data[year]), position] = data[value]
+        return countries, years, values
+
+    def _year_position(self, year: int) -> int:
+        """
+        Posición de un año en el arreglo de indicadores.
+
+        Raises:
+            KeyError: Si no hay datos del año.
+        """
+        try:
+            return self.years.get_loc(year)
+        except KeyError:
+            raise KeyError(
+                f"No indicator data for year {year!r}; available years are {self.years.min()}-{self.years.max()}"
+            ) from None
+
+    def get_year(self, year: int, countries) -> pd.DataFrame:
+        """
+        Obtiene los indicadores de un año para un conjunto de países.
+
+        Args:
+            year (int): El año.
+            countries: Los países (ISO3).
+
+        Returns:
+            pd.DataFrame: Una fila por país (en el orden dado) y una columna por atributo; NaN donde no
+            hay dato.
+
+        Raises:
+            KeyError: Si no hay datos del año.
+        """
+        year_position = self._year_position(year)
+        countries = pd.Index(countries)
+        positions = self.countries.get_indexer(countries)
+        found = positions >= 0
+        year_values = np.full((len(countries), len(self.indicators)), np.nan)
+        year_values[found] = self.values[positions[found], year_position]
+        return pd.DataFrame(year_values, index=countries, columns=list(self.indicators))
+
+    def load_indicator_year(self, indicator: str, year: int) -> pd.Series:
+        """
+        Carga los valores de un indicador en un año. Los indicadores que no están en el arreglo se leen
+        de su archivo.
+
+        Args:
+            indicator (str): El código del indicador (p. ej. "NY.GDP.MKTP.CD").
+            year (int): El año.
+
+        Returns:
+            pd.Series: El valor de cada país (índice ISO3); los países sin dato no se incluyen.
+
+        Raises:
+            KeyError: Si no hay datos del indicador en ese año.
+        """
+        iso_code, value = WBDIndicator.ISO_CODE_3.value, WBDIndicator.VALUE.value
+        codes = list(self.indicators.values())
+        if indicator in codes:
+            indicator_values = self.values[:, self._year_position(year), codes.index(indicator)]
+            return pd.Series(indicator_values, index=self.countries, name=value).dropna()
+
+        data = self._read_indicator(indicator)
+        data = data[data[WBDIndicator.YEAR.value] == year]
+        if data.empty:
+            raise KeyError(f"No data for indicator {indicator!r} in year {year!r}")
+        return data.set_index(iso_code)[value].astype(float)
+
+    def enrich(self, graph: TradeGraph, year: int, drop_incomplete: bool = True) -> TradeGraph:
+        """
+        Asigna los indicadores del año como atributos de los nodos del grafo.
+
+        Args:
+            graph (TradeGraph): El grafo de comercio del año.
+            year (int): El año.
+            drop_incomplete (bool): Si es True, descarta los nodos a los que les falta algún indicador.
+
+        Returns:
+            TradeGraph: El grafo con los atributos (el mismo objeto si no se descarta ningún nodo).
+
+        Raises:
+            KeyError: Si no hay datos del año.
+        """
+        year_values = self.get_year(year, graph.nodes)
+        for attribute in year_values.columns:
+            graph.set_node_attribute(attribute, year_values[attribute].to_numpy())
+        if drop_incomplete:
+            complete = year_values.notna().all(axis=1).to_numpy()
+            if not complete.all():
+                return graph.subgraph(complete)
+        return graph
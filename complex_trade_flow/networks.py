@@ -1,28 +1,52 @@
-from collections import defaultdict
+from collections import OrderedDict, defaultdict
+from pathlib import Path
 from typing import Optional, Dict, Any
+import numpy as np
 import pandas as pd
 
 from .constants import BACIColumnsTradeData
 from .trade_data_loader import TradeDataLoader
-from .utils import ClassificationScheme
+from .trade_tensor import TradeTensor
+from .utils import ClassificationScheme, CodeDictionary
+
+COUNTRY_CODES = "country"
+PRODUCT_CODES = "product"
+
+# Redes publicadas ya adjuntadas en este proceso (ver SharedTradeNetwork.attach)
+_attached_networks: dict[str, "TradeNetwork"] = {}
 
 
 class TradeNetwork:
     """
     Representa una red de comercio para un año específico.
+
+    Con `compact=True` los países, productos y entidades de cada esquema se guardan como códigos
+    enteros pequeños (ver `code_dictionaries`) y solo se decodifican a etiquetas en los resultados
+    de los métodos públicos.
     """
 
     def __init__(
             self,
             trade_data: pd.DataFrame,
-            classification_schemes: list[ClassificationScheme] | None = None
+            classification_schemes: list[ClassificationScheme] | None = None,
+            compact: bool = False
     ):
+        self.compact = compact
+        self.code_dictionaries: dict[str, CodeDictionary] = {}
+        self._entity_row_indexes: dict[tuple[str, str], tuple[pd.Index, np.ndarray, np.ndarray]] = {}
+        self._trade_tensor: TradeTensor | None = None
+
+        if compact:
+            trade_data = self._encode_trade_data(trade_data)
+            self.countries: set[str] = set(self.code_dictionaries[COUNTRY_CODES].labels)
+            self.products: set[str] = set(self.code_dictionaries[PRODUCT_CODES].labels)
+        else:
+            self.countries: set[str] = set(pd.concat([
+                trade_data[BACIColumnsTradeData.IMPORTER_ISO_CODE_3.value],
+                trade_data[BACIColumnsTradeData.EXPORTER_ISO_CODE_3.value]
+            ]).unique())
+            self.products: set[str] = set(trade_data[BACIColumnsTradeData.PRODUCT_CATEGORY_CODE.value])
         self.trade_data = trade_data  # TODO validate trade data
-        self.countries: set[str] = set(pd.concat([
-            self.trade_data[BACIColumnsTradeData.IMPORTER_ISO_CODE_3.value],
-            self.trade_data[BACIColumnsTradeData.EXPORTER_ISO_CODE_3.value]
-        ]).unique())
-        self.products: set[str] = set(self.trade_data[BACIColumnsTradeData.PRODUCT_CATEGORY_CODE.value])
 
         if classification_schemes:
             self.classification_schemes = classification_schemes
@@ -35,7 +59,9 @@ class TradeNetwork:
             cls,
             year: int,
             base_directory: str = "data/processed_data/BACI_HS92_V202401b/cleaned_trade_data/",
-            classification_schemes: list[ClassificationScheme] | None = None
+            classification_schemes: list[ClassificationScheme] | None = None,
+            columns: list[str] | None = None,
+            compact: bool = False
     ) -> "TradeNetwork":
         """
         Crea una instancia de TradeNetwork para un año específico cargando datos de comercio.
@@ -48,14 +74,15 @@ class TradeNetwork:
                 "data/processed_data/BACI_HS92_V202401b/cleaned_trade_data/".
             classification_schemes: Una lista opcional de objetos ClassificationScheme
                 para clasificar los datos comerciales. Por defecto es None.
+            columns: Columnas a cargar. Por defecto las de `TradeDataLoader.load_trade_data`.
+            compact: Si es True, guarda países, productos y entidades como códigos enteros.
 
         Returns:
             Una instancia de la clase TradeNetwork que contiene datos comerciales para el
             año especificado.
         """
-        trade_data = TradeDataLoader(base_directory).load_trade_data(year)
-        return cls(trade_data=trade_data, classification_schemes=classification_schemes)
-
+        trade_data = TradeDataLoader(base_directory).load_trade_data(year, columns=columns)
+        return cls(trade_data=trade_data, classification_schemes=classification_schemes, compact=compact)
 
     def _apply_classifications(self) -> dict[str, dict[str, str]]:
         """
@@ -70,6 +97,74 @@ class TradeNetwork:
             for scheme in self.classification_schemes
         }
 
+    def _encode_trade_data(self, trade_data: pd.DataFrame) -> pd.DataFrame:
+        """
+        Reemplaza exportador, importador y producto por códigos enteros de diccionarios compartidos.
+
+        Exportadores e importadores comparten el mismo diccionario de países.
+        """
+        exporter = BACIColumnsTradeData.EXPORTER_ISO_CODE_3.value
+        importer = BACIColumnsTradeData.IMPORTER_ISO_CODE_3.value
+        product = BACIColumnsTradeData.PRODUCT_CATEGORY_CODE.value
+
+        self.code_dictionaries[COUNTRY_CODES] = CodeDictionary(
+            pd.Index(trade_data[exporter].unique()).append(pd.Index(trade_data[importer].unique()))
+        )
+        self.code_dictionaries[PRODUCT_CODES] = CodeDictionary(trade_data[product].unique())
+
+        encoded_trade_data = trade_data.copy(deep=False)
+        encoded_trade_data[exporter] = self.code_dictionaries[COUNTRY_CODES].encode(trade_data[exporter])
+        encoded_trade_data[importer] = self.code_dictionaries[COUNTRY_CODES].encode(trade_data[importer])
+        encoded_trade_data[product] = self.code_dictionaries[PRODUCT_CODES].encode(trade_data[product])
+        return encoded_trade_data
+
+    def _column_code_dictionaries(self) -> dict[str, CodeDictionary]:
+        """
+        Relaciona cada columna codificada con su diccionario.
+        """
+        column_dictionaries = {
+            BACIColumnsTradeData.EXPORTER_ISO_CODE_3.value: self.code_dictionaries[COUNTRY_CODES],
+            BACIColumnsTradeData.IMPORTER_ISO_CODE_3.value: self.code_dictionaries[COUNTRY_CODES],
+            BACIColumnsTradeData.PRODUCT_CATEGORY_CODE.value: self.code_dictionaries[PRODUCT_CODES],
+        }
+        for scheme_name in getattr(self, "classified_countries", {}):
+            column_dictionaries[f"{scheme_name}_importer"] = self.code_dictionaries[scheme_name]
+            column_dictionaries[f"{scheme_name}_exporter"] = self.code_dictionaries[scheme_name]
+        return column_dictionaries
+
+    def decode(self, data: pd.DataFrame) -> pd.DataFrame:
+        """
+        Decodifica las columnas de códigos enteros de un DataFrame a sus etiquetas.
+
+        Args:
+            data (pd.DataFrame): Un subconjunto de `trade_data` o `trade_data_classified`.
+
+        Returns:
+            pd.DataFrame: El mismo DataFrame con etiquetas; sin cambios si la red no es compacta.
+        """
+        if not self.compact:
+            return data
+        decoded_data = data.copy(deep=False)
+        for column, code_dictionary in self._column_code_dictionaries().items():
+            if column in decoded_data.columns:
+                decoded_data[column] = code_dictionary.decode(decoded_data[column].to_numpy())
+        return decoded_data
+
+    def decode_entities(self, scheme_name: str, values) -> pd.Index:
+        """
+        Decodifica códigos de entidades de un esquema a sus etiquetas.
+
+        Args:
+            scheme_name (str): El nombre del esquema de clasificación.
+            values: Códigos (red compacta) o etiquetas (red sin codificar).
+
+        Returns:
+            pd.Index: Las etiquetas de las entidades.
+        """
+        if not self.compact:
+            return pd.Index(np.asarray(values, dtype=object))
+        return pd.Index(self.code_dictionaries[scheme_name].decode(np.asarray(values)))
+
     def _classify_trade_data(self) -> pd.DataFrame:
         """
         Organiza los datos de comercio por clasificaciones.
@@ -77,19 +172,153 @@ class TradeNetwork:
         Returns:
             pd.DataFrame: Los datos de comercio agrupados por categoría de producto, importador y exportador.
         """
-        classified_trade_data = self.trade_data.copy()
+        # La copia superficial comparte las columnas de trade_data; solo se agregan las de entidades
+        classified_trade_data = self.trade_data.copy(deep=False)
+        self._add_classification_columns(classified_trade_data, self.classified_countries)
+        return classified_trade_data
 
-        for scheme_name, classified_countries in self.classified_countries.items():
-            classified_trade_data[f"{scheme_name}_importer"] = classified_trade_data[
-                BACIColumnsTradeData.IMPORTER_ISO_CODE_3.value
-            ].map(classified_countries.get)
-            classified_trade_data[f"{scheme_name}_exporter"] = classified_trade_data[
-                BACIColumnsTradeData.EXPORTER_ISO_CODE_3.value
-            ].map(classified_countries.get)
+    def _add_classification_columns(
+            self,
+            classified_trade_data: pd.DataFrame,
+            classified_countries_by_scheme: dict[str, dict[str, str]]
+    ) -> None:
+        """
+        Agrega a los datos clasificados las columnas de importador y exportador de cada esquema.
+        """
+        if self.compact:
+            country_labels = self.code_dictionaries[COUNTRY_CODES].labels
+            for scheme_name, classified_countries in classified_countries_by_scheme.items():
+                # Se clasifica cada país una sola vez y se propaga a las filas por su código
+                entity_dictionary = CodeDictionary(self.entities[scheme_name])
+                self.code_dictionaries[scheme_name] = entity_dictionary
+                country_to_entity = np.append(
+                    entity_dictionary.encode([classified_countries.get(country) for country in country_labels]),
+                    entity_dictionary.dtype(-1)
+                )
+                classified_trade_data[f"{scheme_name}_importer"] = country_to_entity[
+                    classified_trade_data[BACIColumnsTradeData.IMPORTER_ISO_CODE_3.value].to_numpy()
+                ]
+                classified_trade_data[f"{scheme_name}_exporter"] = country_to_entity[
+                    classified_trade_data[BACIColumnsTradeData.EXPORTER_ISO_CODE_3.value].to_numpy()
+                ]
+            return
 
-        return classified_trade_data
+        # Se clasifica cada país distinto una sola vez y se propaga a las filas por su código
+        country_codes = {}
+        for direction, column in (
+                ("importer", BACIColumnsTradeData.IMPORTER_ISO_CODE_3.value),
+                ("exporter", BACIColumnsTradeData.EXPORTER_ISO_CODE_3.value)
+        ):
+            values = classified_trade_data[column]
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                country_codes[direction] = (values.cat.codes.to_numpy(), values.cat.categories)
+            else:
+                country_codes[direction] = pd.factorize(values)
+
+        for scheme_name, classified_countries in classified_countries_by_scheme.items():
+            for direction, (codes, countries) in country_codes.items():
+                classified_trade_data[f"{scheme_name}_{direction}"] = self._broadcast_classification(
+                    codes, countries, classified_countries
+                )
+
+    @staticmethod
+    def _broadcast_classification(
+            codes: np.ndarray,
+            countries: pd.Index,
+            classified_countries: dict[str, str]
+    ) -> pd.Categorical:
+        """
+        Construye la columna categórica de entidades a partir de los códigos de país de cada fila.
+
+        Args:
+            codes (np.ndarray): El código de país de cada fila (-1 para el país faltante).
+            countries (pd.Index): Los países distintos; la posición es su código.
+            classified_countries (dict[str, str]): La entidad de cada país.
+
+        Returns:
+            pd.Categorical: La entidad de cada fila; faltante si el país no tiene entidad.
+        """
+        missing_country_entity = next(
+            (entity for country, entity in classified_countries.items() if pd.isna(country)), None
+        )
+        # La última posición corresponde al código -1, de modo que los países faltantes también se clasifican
+        country_to_entity, entities = pd.factorize(pd.Series(
+            [classified_countries.get(country) for country in countries] + [missing_country_entity],
+            dtype=object
+        ))
+        return pd.Categorical.from_codes(country_to_entity[codes], categories=entities)
+
+    def add_classification_schemes(self, classification_schemes: list[ClassificationScheme]) -> None:
+        """
+        Aplica esquemas de clasificación adicionales a una red ya creada.
 
-    def filter_data_by_entities(self, scheme_name: str, importers=None, exporters=None):
+        Solo se agregan las columnas de los esquemas nuevos (identificados por su nombre); los datos
+        de comercio no se vuelven a cargar ni a copiar.
+
+        Args:
+            classification_schemes (list[ClassificationScheme]): Los esquemas a aplicar.
+        """
+        applied_schemes = {scheme.name for scheme in getattr(self, "classification_schemes", [])}
+        new_schemes = [scheme for scheme in classification_schemes if scheme.name not in applied_schemes]
+        if not new_schemes:
+            return
+
+        if not hasattr(self, "trade_data_classified"):
+            self.classification_schemes = []
+            self.classified_countries = {}
+            self.entities = {}
+            self.trade_data_classified = self.trade_data.copy(deep=False)
+
+        new_classified_countries = {
+            scheme.name: scheme.apply_classification(self.countries) for scheme in new_schemes
+        }
+        self.classification_schemes = self.classification_schemes + new_schemes
+        self.classified_countries.update(new_classified_countries)
+        self.entities.update(self._get_entities(new_classified_countries))
+        self._add_classification_columns(self.trade_data_classified, new_classified_countries)
+
+    def trade_tensor(self) -> TradeTensor:
+        """
+        Devuelve el tensor disperso exportador × importador × producto de la red.
+
+        Se construye la primera vez que se pide y se reutiliza después. En una red compacta usa los
+        mismos diccionarios de países y productos que `trade_data`.
+
+        Returns:
+            TradeTensor: El tensor con los valores de dinero y masa disponibles.
+        """
+        if self._trade_tensor is None:
+            if self.compact:
+                self._trade_tensor = TradeTensor.from_trade_data(
+                    self.trade_data,
+                    countries=self.code_dictionaries[COUNTRY_CODES],
+                    products=self.code_dictionaries[PRODUCT_CODES]
+                )
+            else:
+                self._trade_tensor = TradeTensor.from_trade_data(self.trade_data)
+        return self._trade_tensor
+
+    def memory_usage(self) -> int:
+        """
+        Estima la memoria (en bytes) de la red, sin contar dos veces los datos compartidos: la tabla
+        de comercio más las estructuras derivadas (ver `derived_memory_usage`).
+        """
+        trade_data = getattr(self, "trade_data_classified", self.trade_data)
+        return int(trade_data.memory_usage(index=True, deep=True).sum()) + self.derived_memory_usage()
+
+    def derived_memory_usage(self) -> int:
+        """
+        Memoria (en bytes) de las estructuras que se construyen bajo demanda: los índices de filas por
+        entidad y el tensor disperso. Es barata de calcular, a diferencia de la de la tabla.
+        """
+        index_bytes = sum(
+            labels.nbytes + order.nbytes + offsets.nbytes
+            for labels, order, offsets in self._entity_row_indexes.values()
+        )
+        tensor_bytes = self._trade_tensor.nbytes if self._trade_tensor is not None else 0
+        return int(index_bytes) + tensor_bytes
+
+    def filter_data_by_entities(self, scheme_name: str, importers=None, exporters=None, decode: bool = True):
         """
         Filters trade data based on specified importer and exporter classifications.
         Pro defecto importers y exportes traen todas las entidades
@@ -98,21 +327,154 @@ class TradeNetwork:
             scheme_name (str): The name of the classification scheme to use.
             importers (list, optional): List of importer classifications. Defaults to None.
             exporters (list, optional): List of exporter classifications. Defaults to None.
+            decode (bool, optional): In a compact network, whether to decode the integer codes of
+                the result back to labels. Defaults to True.
 
         Returns:
             DataFrame: Filtered trade data based on the specified classifications.
         """
+        selected_rows = self._entity_rows(scheme_name, importers=importers, exporters=exporters)
+        trade_data = (
+            self.trade_data_classified if selected_rows is None
+            else self.trade_data_classified.iloc[selected_rows]
+        )
+
         importers = importers or self.entities[scheme_name]
         exporters = exporters or self.entities[scheme_name]
-        return self.trade_data_classified[
+
+        if self.compact:
+            entity_dictionary = self.code_dictionaries[scheme_name]
+            importer_codes = entity_dictionary.encode(list(importers))
+            exporter_codes = entity_dictionary.encode(list(exporters))
+            filtered_data = trade_data[
+                np.isin(
+                    trade_data[f"{scheme_name}_importer"].to_numpy(),
+                    importer_codes[importer_codes >= 0]
+                )
+                & np.isin(
+                    trade_data[f"{scheme_name}_exporter"].to_numpy(),
+                    exporter_codes[exporter_codes >= 0]
+                )
+            ]
+            return self.decode(filtered_data) if decode else filtered_data
+
+        return trade_data[
             (
-                self.trade_data_classified[f"{scheme_name}_importer"].isin(importers)
+                trade_data[f"{scheme_name}_importer"].isin(importers)
             )
             & (
-                self.trade_data_classified[f"{scheme_name}_exporter"].isin(exporters)
+                trade_data[f"{scheme_name}_exporter"].isin(exporters)
             )
             ]
 
+    def _entity_rows(self, scheme_name: str, importers=None, exporters=None) -> np.ndarray | None:
+        """
+        Obtiene, a partir del índice por entidad, las posiciones de las filas de las entidades pedidas.
+
+        Returns:
+            np.ndarray | None: Posiciones ordenadas de las filas candidatas, o None si no se pidió
+            ningún importador ni exportador (en ese caso se recorre la tabla completa).
+        """
+        selected_rows = None
+        for direction, entities in (("importer", importers), ("exporter", exporters)):
+            if not entities:
+                continue
+            labels, order, offsets = self._entity_row_index(scheme_name, direction)
+            codes = np.unique(labels.get_indexer(list(entities)))
+            rows = np.sort(np.concatenate(
+                [order[offsets[code]:offsets[code + 1]] for code in codes[codes >= 0]]
+                or [np.empty(0, dtype=order.dtype)]
+            ))
+            selected_rows = rows if selected_rows is None else np.intersect1d(selected_rows, rows, assume_unique=True)
+        return selected_rows
+
+    def _entity_row_index(self, scheme_name: str, direction: str) -> tuple[pd.Index, np.ndarray, np.ndarray]:
+        """
+        Construye (una sola vez por esquema y dirección) el índice de filas por entidad.
+
+        Las posiciones de las filas se ordenan por entidad; las filas de la entidad con código `c`
+        son `order[offsets[c]:offsets[c + 1]]`.
+
+        Args:
+            scheme_name (str): El nombre del esquema de clasificación.
+            direction (str): "importer" o "exporter".
+
+        Returns:
+            tuple[pd.Index, np.ndarray, np.ndarray]: Las etiquetas de las entidades (la posición es
+            su código), el orden de las filas y los desplazamientos de cada entidad.
+        """
+        key = (scheme_name, direction)
+        if key not in self._entity_row_indexes:
+            column = self.trade_data_classified[f"{scheme_name}_{direction}"]
+            if self.compact:
+                labels = self.code_dictionaries[scheme_name].labels
+                codes = column.to_numpy()
+            else:
+                codes, labels = pd.factorize(column, use_na_sentinel=False)
+            order = np.argsort(codes, kind="stable")
+            offsets = np.searchsorted(codes[order], np.arange(len(labels) + 1))
+            self._entity_row_indexes[key] = (labels, order, offsets)
+        return self._entity_row_indexes[key]
+
+    def share(self, folder: str) -> "SharedTradeNetwork":
+        """
+        Publica los datos de la red como arreglos NumPy en `folder` para compartirlos entre procesos.
+
+        Las columnas categóricas se guardan como sus códigos y las columnas de texto se convierten
+        antes a categorías, de modo que todos los arreglos se pueden mapear en memoria.
+
+        Args:
+            folder (str): Directorio donde escribir los arreglos (idealmente en memoria, p. ej. /dev/shm).
+
+        Returns:
+            SharedTradeNetwork: Una referencia liviana y serializable a la red publicada.
+        """
+        trade_data = getattr(self, "trade_data_classified", self.trade_data)
+        column_dtypes = {}
+        for position, column in enumerate(trade_data.columns):
+            values = trade_data[column]
+            if values.dtype == object:
+                values = values.astype("category")
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                column_dtypes[column] = values.dtype
+                values = values.cat.codes
+            else:
+                column_dtypes[column] = None
+            np.save(Path(folder) / f"{position}.npy", values.to_numpy())
+
+        state = {
+            attribute: value for attribute, value in self.__dict__.items()
+            if attribute not in ("trade_data", "trade_data_classified", "_entity_row_indexes", "_trade_tensor")
+        }
+        return SharedTradeNetwork(
+            folder=folder,
+            column_dtypes=column_dtypes,
+            trade_data_columns=list(self.trade_data.columns),
+            classified=hasattr(self, "trade_data_classified"),
+            state=state
+        )
+
+    @classmethod
+    def _from_shared(cls, shared_network: "SharedTradeNetwork") -> "TradeNetwork":
+        """
+        Reconstruye una red publicada con `share` mapeando sus arreglos en memoria, sin copiarlos.
+        """
+        arrays = {}
+        for position, (column, dtype) in enumerate(shared_network.column_dtypes.items()):
+            values = np.load(Path(shared_network.folder) / f"{position}.npy", mmap_mode="r")
+            arrays[column] = values if dtype is None else pd.Categorical.from_codes(values, dtype=dtype, validate=False)
+
+        network = cls.__new__(cls)
+        network.__dict__.update(shared_network.state)
+        network._entity_row_indexes = {}
+        network._trade_tensor = None
+        network.trade_data = pd.DataFrame(
+            {column: arrays[column] for column in shared_network.trade_data_columns}, copy=False
+        )
+        if shared_network.classified:
+            network.trade_data_classified = pd.DataFrame(arrays, copy=False)
+        return network
+
     @staticmethod
     def _get_entities(first_dict: dict[str, dict[str, str]]) -> dict[str, set]:
         inverted_dict = defaultdict(set)
@@ -122,3 +484,161 @@ class TradeNetwork:
             inverted_dict[main_key] = set(second_dict.values())
 
         return dict(inverted_dict)
+
+
+class SharedTradeNetwork:
+    """
+    Referencia serializable a una TradeNetwork publicada con `TradeNetwork.share`.
+
+    Se envía a los procesos de joblib en lugar de la red completa; cada proceso la adjunta una sola
+    vez con `attach` y trabaja sobre los arreglos mapeados en memoria. Cada proceso mantiene adjunta
+    a lo sumo una red (la última), hasta el siguiente `attach` o hasta `detach`.
+    """
+
+    def __init__(
+            self,
+            folder: str,
+            column_dtypes: dict[str, pd.CategoricalDtype | None],
+            trade_data_columns: list[str],
+            classified: bool,
+            state: dict[str, Any]
+    ):
+        self.folder = folder
+        self.column_dtypes = column_dtypes
+        self.trade_data_columns = trade_data_columns
+        self.classified = classified
+        self.state = state
+
+    def attach(self) -> TradeNetwork:
+        """
+        Devuelve la red publicada, reconstruyéndola solo la primera vez en cada proceso.
+        """
+        if self.folder not in _attached_networks:
+            _attached_networks.clear()  # Solo se mantiene adjunta la última red publicada
+            _attached_networks[self.folder] = TradeNetwork._from_shared(self)
+        return _attached_networks[self.folder]
+
+    def detach(self) -> None:
+        """
+        Libera la red adjunta en este proceso, si lo está, para que sus arreglos mapeados se puedan
+        liberar una vez borrado `folder`. Un `attach` posterior la vuelve a reconstruir.
+        """
+        _attached_networks.pop(self.folder, None)
+
+    @staticmethod
+    def detach_all() -> None:
+        """
+        Libera todas las redes adjuntas en este proceso.
+        """
+        _attached_networks.clear()
+
+
+class TradeNetworkCache:
+    """
+    Caché LRU en memoria de redes de comercio cargadas con `TradeNetwork.from_year`.
+
+    Las redes se identifican por año, directorio, columnas y representación (`compact`). Los esquemas
+    de clasificación se acumulan: si se pide una red ya cargada con un esquema nuevo, solo se agregan
+    las columnas de ese esquema. La memoria de la tabla de cada red se mide una vez al cargarla (y la
+    de las columnas que se le agregan, al agregarlas); la de los índices y tensores que los análisis
+    construyen después se suma en cada consulta. Cuando el total supera `max_bytes` se descartan las
+    redes usadas hace más tiempo (siempre se conserva la última).
+    """
+
+    def __init__(self, max_bytes: int = 8 * 1024 ** 3, max_networks: int | None = None):
+        """
+        Args:
+            max_bytes: Memoria estimada máxima de las redes guardadas.
+            max_networks: Número máximo de redes guardadas. Por defecto sin límite.
+        """
+        self.max_bytes = max_bytes
+        self.max_networks = max_networks
+        self._networks: OrderedDict[tuple, TradeNetwork] = OrderedDict()
+        self._network_bytes: dict[tuple, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._networks)
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Memoria estimada de las redes de la caché: la de sus tablas, medida al agregarlas, más la de
+        las estructuras construidas después por los análisis (índices por entidad y tensores).
+        """
+        return sum(
+            table_bytes + self._networks[key].derived_memory_usage()
+            for key, table_bytes in self._network_bytes.items()
+        )
+
+    def stats(self) -> dict[str, int]:
+        """
+        Contadores de aciertos, fallos y descartes, junto con el tamaño actual de la caché.
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "networks": len(self),
+            "nbytes": self.nbytes,
+        }
+
+    def get(
+            self,
+            year: int,
+            base_directory: str = "data/processed_data/BACI_HS92_V202401b/cleaned_trade_data/",
+            classification_schemes: list[ClassificationScheme] | None = None,
+            columns: list[str] | None = None,
+            compact: bool = False
+    ) -> TradeNetwork:
+        """
+        Devuelve la red del año, cargándola solo si no está en la caché. Ver `TradeNetwork.from_year`.
+        """
+        key = (year, str(base_directory), tuple(columns) if columns else None, compact)
+
+        if key in self._networks:
+            self.hits += 1
+            self._networks.move_to_end(key)
+            network = self._networks[key]
+            previous_columns = set(getattr(network, "trade_data_classified", network.trade_data).columns)
+            network.add_classification_schemes(classification_schemes or [])
+            new_columns = [
+                column for column in getattr(network, "trade_data_classified", network.trade_data).columns
+                if column not in previous_columns
+            ]
+            if new_columns:
+                # Solo se mide la memoria de las columnas agregadas; el resto ya está contado
+                self._network_bytes[key] += int(
+                    network.trade_data_classified[new_columns].memory_usage(index=False, deep=True).sum()
+                )
+        else:
+            self.misses += 1
+            network = TradeNetwork.from_year(
+                year,
+                base_directory=base_directory,
+                classification_schemes=classification_schemes,
+                columns=columns,
+                compact=compact
+            )
+            self._networks[key] = network
+            self._network_bytes[key] = network.memory_usage() - network.derived_memory_usage()
+
+        self.trim()
+        return network
+
+    def clear(self) -> None:
+        self._networks.clear()
+        self._network_bytes.clear()
+
+    def trim(self) -> None:
+        """
+        Descarta redes hasta respetar `max_bytes` y `max_networks`. Conviene llamarlo después de
+        analizar una red, ya que los análisis construyen índices y tensores que aumentan su memoria.
+        """
+        max_networks = max(1, self.max_networks or len(self._networks))
+        while len(self._networks) > 1 and (self.nbytes > self.max_bytes or len(self._networks) > max_networks):
+            key, _ = self._networks.popitem(last=False)
+            del self._network_bytes[key]
+            self.evictions += 1
@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+import hashlib
+import inspect
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from .complexity import RCA_THRESHOLD, ComplexityCalculator
+from .constants import BACIColumnsTradeData
+from .networks import TradeNetwork
+from .trade_tensor import EXPORTER, PRODUCT
+from .utils import ClassificationScheme
+
+PROXIMITY_BLOCK_SIZE = 1024
+
+
+class ProductSpace:
+    """
+    Product x product proximity matrix of a year (Hidalgo et al., 2007).
+
+    The proximity of two products is the minimum of the conditional probabilities of exporting one
+    with RCA given the other: phi_pp' = C_pp' / max(u_p, u_p'), where C = M^T M counts the entities
+    specialized in both products and u is the ubiquity. The matrix is kept sparse; the diagonal
+    (phi_pp = 1) is not stored.
+    """
+
+    def __init__(self, proximity: sparse.csr_matrix, products: pd.Index):
+        self.proximity = proximity
+        self.products = products
+
+    @staticmethod
+    def calculate_proximity(
+            specialization: sparse.spmatrix,
+            threshold: float = 0.0,
+            dtype: type = np.float64,
+            block_size: int = PROXIMITY_BLOCK_SIZE
+    ) -> sparse.csr_matrix:
+        """
+        Calculates the proximity matrix from the binary entity x product matrix M, one block of
+        products at a time so that only the proximities above the threshold are ever stored for
+        more than a block.
+
+        Args:
+            specialization (sparse.spmatrix): The binary entity x product matrix M.
+            threshold (float): Proximities below this value are dropped.
+            dtype (type): The dtype of the computation and of the result (np.float32 halves the memory).
+            block_size (int): Number of products (rows of the result) computed at a time.
+
+        Returns:
+            sparse.csr_matrix: The products x products proximity matrix, without the diagonal.
+        """
+        specialization = sparse.csc_matrix(specialization, dtype=dtype)
+        ubiquity = np.asarray(specialization.sum(axis=0)).ravel()
+        transposed = specialization.T.tocsr()
+        n_products = specialization.shape[1]
+
+        blocks = []
+        for start in range(0, n_products, block_size):
+            block = sparse.coo_matrix(transposed[start:start + block_size] @ specialization)
+            rows, columns = block.row + start, block.col
+            proximity = (block.data / np.maximum(ubiquity[rows], ubiquity[columns])).astype(dtype)
+            kept = (rows != columns) & (proximity >= threshold)
+            blocks.append(sparse.coo_matrix(
+                (proximity[kept], (block.row[kept], columns[kept])),
+                shape=block.shape
+            ).tocsr())
+        if not blocks:
+            return sparse.csr_matrix((n_products, n_products), dtype=dtype)
+        return sparse.vstack(blocks, format="csr", dtype=dtype)
+
+    @classmethod
+    def from_trade_network(
+            cls,
+            trade_network: TradeNetwork,
+            scheme_name: str | None = None,
+            column: str = BACIColumnsTradeData.MONEY.value,
+            rca_threshold: float = RCA_THRESHOLD,
+            threshold: float = 0.0,
+            dtype: type = np.float64,
+            block_size: int = PROXIMITY_BLOCK_SIZE
+    ) -> "ProductSpace":
+        """
+        Builds the product space of a network.
+
+        Args:
+            trade_network (TradeNetwork): The trade network.
+            scheme_name (str, optional): Classification scheme whose entities are the exporters. By
+                default the exporters are the countries.
+            column (str): The exported values to use.
+            rca_threshold (float): The RCA threshold of the specialization matrix.
+            threshold (float): See `calculate_proximity`.
+            dtype (type): See `calculate_proximity`.
+            block_size (int): See `calculate_proximity`.
+
+        Returns:
+            ProductSpace: The proximity matrix and its product labels.
+        """
+        if scheme_name is None:
+            tensor = trade_network.trade_tensor()
+            exports, products = tensor.matrix(EXPORTER, PRODUCT, column), tensor.labels[PRODUCT]
+        else:
+            exports, _, products = ComplexityCalculator.calculate_export_matrix_by_entity(
+                trade_network, scheme_name, column
+            )
+        specialization = ComplexityCalculator.calculate_specialization_matrix(exports, rca_threshold)
+        return cls(cls.calculate_proximity(specialization, threshold, dtype, block_size), products)
+
+    @staticmethod
+    def file_paths(directory: str | Path, year: int) -> tuple[Path, Path]:
+        """
+        Devuelve las rutas de la matriz de proximidad y de las etiquetas de productos de un año.
+        """
+        return (
+            Path(directory) / f"product_space_{year}.npz",
+            Path(directory) / f"product_space_{year}_products.npy",
+        )
+
+    def save(self, directory: str | Path, year: int) -> Path:
+        """
+        Guarda la matriz de proximidad (npz disperso) y las etiquetas de productos de un año.
+
+        Returns:
+            Path: La ruta de la matriz guardada.
+        """
+        proximity_path, products_path = self.file_paths(directory, year)
+        proximity_path.parent.mkdir(parents=True, exist_ok=True)
+        sparse.save_npz(proximity_path, self.proximity)
+        np.save(products_path, self.products.to_numpy())
+        return proximity_path
+
+    @classmethod
+    def load(cls, directory: str | Path, year: int) -> "ProductSpace":
+        """
+        Carga el espacio de productos de un año guardado con `save`.
+        """
+        proximity_path, products_path = cls.file_paths(directory, year)
+        return cls(sparse.load_npz(proximity_path).tocsr(), pd.Index(np.load(products_path)))
+
+    @staticmethod
+    def options_path(directory: str | Path, year: int) -> Path:
+        """
+        Devuelve la ruta de las opciones con que se calculó el espacio de productos guardado de un año.
+        """
+        return Path(directory) / f"product_space_{year}_options.json"
+
+    @classmethod
+    def for_year(
+            cls,
+            year: int,
+            directory: str | Path,
+            base_directory: str = "data/processed_data/BACI_HS92_V202401b/cleaned_trade_data/",
+            classification_schemes: list[ClassificationScheme] | None = None,
+            **options
+    ) -> "ProductSpace":
+        """
+        Carga el espacio de productos de un año si ya fue guardado en `directory` con las mismas
+        opciones; si no, lo calcula a partir de los datos limpios y lo guarda junto con sus opciones.
+
+        Args:
+            year (int): El año.
+            directory (str | Path): Directorio de los espacios de productos guardados.
+            base_directory (str): Directorio de los datos de comercio limpios.
+            classification_schemes (list[ClassificationScheme], optional): Esquemas entre los que se
+                busca el de `scheme_name`, si se pide uno.
+            **options: Opciones de `from_trade_network` (scheme_name, threshold, dtype, block_size, ...).
+
+        Returns:
+            ProductSpace: El espacio de productos del año.
+
+        Raises:
+            ValueError: Si `scheme_name` no es el nombre de ninguno de `classification_schemes`.
+        """
+        scheme_name = options.get("scheme_name")
+        schemes = [scheme for scheme in classification_schemes or [] if scheme.name == scheme_name]
+        if scheme_name is not None and not schemes:
+            raise ValueError(f"scheme_name={scheme_name!r} is not one of the given classification_schemes")
+
+        proximity_path, _ = cls.file_paths(directory, year)
+        options_path = cls.options_path(directory, year)
+        settings = cls._settings(base_directory, schemes[0] if schemes else None, options)
+        if proximity_path.exists() and options_path.exists() and json.loads(options_path.read_text()) == settings:
+            return cls.load(directory, year)
+        trade_network = TradeNetwork.from_year(year, base_directory=base_directory, classification_schemes=schemes[:1])
+        product_space = cls.from_trade_network(trade_network, **options)
+        product_space.save(directory, year)
+        options_path.write_text(json.dumps(settings))
+        return product_space
+
+    @classmethod
+    def _settings(cls, base_directory: str, scheme: ClassificationScheme | None, options: dict) -> dict:
+        """
+        Opciones que determinan el resultado de `for_year`, con los valores por defecto completados y
+        el hash de la clasificación del esquema usado. El tamaño de bloque no cambia el resultado y no
+        se incluye.
+        """
+        parameters = inspect.signature(cls.from_trade_network).parameters
+        settings = {
+            name: options.get(name, parameter.default)
+            for name, parameter in parameters.items()
+            if name not in ("trade_network", "block_size")
+        }
+        settings["dtype"] = np.dtype(settings["dtype"]).name
+        settings["base_directory"] = str(Path(base_directory).resolve())
+        if scheme is not None:
+            classification = json.dumps(sorted(scheme.classification_data.items()), default=str)
+            settings["classification_sha256"] = hashlib.sha256(classification.encode()).hexdigest()
+        return settings
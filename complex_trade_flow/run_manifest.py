@@ -0,0 +1,107 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from .utils import ClassificationScheme
+
+
+class RunManifest:
+    """
+    Registro de las unidades (análisis, esquema, año) ya calculadas en un directorio de resultados.
+
+    Cada unidad guarda la huella de sus entradas (archivo limpio del año, esquema de clasificación y
+    opciones del análisis) y la ruta de su resultado. Al volver a ejecutar un análisis se omiten las unidades
+    cuyas entradas no cambiaron y cuyo resultado sigue existiendo.
+    """
+    FILE_NAME = "run_manifest.json"
+
+    def __init__(self, output_directory: str):
+        self.path = Path(output_directory) / self.FILE_NAME
+        self.units: dict[str, dict] = json.loads(self.path.read_text()) if self.path.exists() else {}
+
+    @staticmethod
+    def unit_key(analysis: str, scheme_name: str, year: int) -> str:
+        return f"{analysis}/{scheme_name}/{year}"
+
+    @staticmethod
+    def file_fingerprint(file_path: str | Path, content_hash: bool = False) -> dict:
+        """
+        Calcula la huella de un archivo a partir de su tamaño y fecha de modificación.
+
+        Args:
+            file_path (str | Path): La ruta del archivo.
+            content_hash (bool): Si es True, agrega el hash SHA-256 del contenido. Se usa para archivos
+                pequeños como los de los esquemas; los datos limpios se identifican por tamaño y fecha.
+
+        Returns:
+            dict: La huella del archivo.
+        """
+        stat = os.stat(file_path)
+        fingerprint = {"path": str(file_path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+        if content_hash:
+            fingerprint["sha256"] = hashlib.sha256(Path(file_path).read_bytes()).hexdigest()
+        return fingerprint
+
+    @staticmethod
+    def input_fingerprint(
+            trade_data_file: str | Path,
+            scheme: ClassificationScheme,
+            options: dict | None = None
+    ) -> dict:
+        """
+        Calcula la huella de las entradas de una unidad: el archivo limpio del año, el esquema y las
+        opciones del análisis que cambian su resultado.
+
+        El esquema se identifica por el hash de la clasificación cargada en memoria (la que realmente
+        se aplica), no por el archivo en disco.
+
+        Args:
+            trade_data_file (str | Path): El archivo limpio del año.
+            scheme (ClassificationScheme): El esquema de clasificación.
+            options (dict, optional): Opciones serializables en JSON (p. ej. vectorized y columnas).
+
+        Returns:
+            dict: La huella de la unidad.
+        """
+        classification = json.dumps(sorted(scheme.classification_data.items()), default=str)
+        return {
+            "trade_data": RunManifest.file_fingerprint(trade_data_file),
+            "scheme": {
+                "name": scheme.name,
+                "key_column": scheme.key_column,
+                "value_column": scheme.value_column,
+                "sha256": hashlib.sha256(classification.encode()).hexdigest(),
+            },
+            "options": options or {},
+        }
+
+    def is_up_to_date(self, analysis: str, scheme_name: str, year: int, fingerprint: dict) -> bool:
+        """
+        Indica si la unidad ya fue calculada con las mismas entradas y su resultado sigue existiendo.
+        """
+        unit = self.units.get(self.unit_key(analysis, scheme_name, year))
+        return (
+            unit is not None
+            and unit["inputs"] == fingerprint
+            and Path(unit["output"]).exists()
+        )
+
+    def record(self, analysis: str, scheme_name: str, year: int, fingerprint: dict, output_path: str) -> None:
+        """
+        Registra una unidad terminada y guarda el manifiesto de inmediato.
+        """
+        self.units[self.unit_key(analysis, scheme_name, year)] = {
+            "inputs": fingerprint,
+            "output": str(output_path),
+        }
+        self.save()
+
+    def save(self) -> None:
+        """
+        Escribe el manifiesto de forma atómica para no corromperlo si la ejecución se interrumpe.
+        """
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temporary_path = self.path.with_suffix(".json.tmp")
+        temporary_path.write_text(json.dumps(self.units, indent=2, sort_keys=True))
+        os.replace(temporary_path, self.path)
@@ -1,34 +1,412 @@
+import os
 from pathlib import Path
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 
-from .constants import BACIColumnsTradeData
+from .constants import BACIColumnsTradeData, StorageFormat
+
+# Tipos explícitos de las columnas de los datos limpios. Los códigos ISO3 se guardan como
+# categorías (codificación por diccionario en Parquet) y los códigos de producto HS6 caben en int32.
+TRADE_DATA_DTYPES: dict[str, str] = {
+    BACIColumnsTradeData.YEAR.value: "int16",
+    BACIColumnsTradeData.EXPORTER_ISO_CODE_3.value: "category",
+    BACIColumnsTradeData.IMPORTER_ISO_CODE_3.value: "category",
+    BACIColumnsTradeData.PRODUCT_CATEGORY_CODE.value: "int32",
+    BACIColumnsTradeData.MONEY.value: "float64",
+    BACIColumnsTradeData.MASS.value: "float64",
+}
+
+DEFAULT_TRADE_DATA_COLUMNS: list[str] = [
+    BACIColumnsTradeData.PRODUCT_CATEGORY_CODE.value,
+    BACIColumnsTradeData.EXPORTER_ISO_CODE_3.value,
+    BACIColumnsTradeData.IMPORTER_ISO_CODE_3.value,
+    BACIColumnsTradeData.MONEY.value
+]
+
+# Filas por row group: los archivos se ordenan por exportador, de modo que las estadísticas
+# min/max de cada row group permiten descartar grupos completos al filtrar por país.
+PARQUET_ROW_GROUP_SIZE = 500_000
+
+# Máximo de filas que `TradeDataWriter` ordena en memoria a la vez al cerrar el archivo
+SORT_BUFFER_ROWS = 4 * PARQUET_ROW_GROUP_SIZE
+
+Filters = list[tuple] | list[list[tuple]]
 
 
 class TradeDataLoader:
     """
     Responsable de cargar y preprocesar los datos de comercio.
+
+    Los años limpios pueden estar almacenados en Parquet (preferido) o en CSV; el formato
+    se detecta automáticamente según el archivo presente en `data_dir`.
     """
     def __init__(self, data_dir: str):
         self.data_dir = data_dir
 
-    def load_trade_data(self, year: int) -> pd.DataFrame:
+    def get_file_path(self, year: int, storage_format: StorageFormat) -> Path:
+        """
+        Construye la ruta del archivo limpio de un año para un formato dado.
+        """
+        return Path(self.data_dir) / f"cleaned_HS92_Y{year}_V202401b.{storage_format.value}"
+
+    def find_trade_data_file(self, year: int) -> Path:
+        """
+        Busca el archivo limpio de un año, prefiriendo Parquet sobre CSV.
+
+        Args:
+            year (int): El año de los datos.
+
+        Returns:
+            Path: La ruta del archivo encontrado.
+
+        Raises:
+            FileNotFoundError: Si no existe el año en ninguno de los formatos soportados.
+        """
+        for storage_format in (StorageFormat.PARQUET, StorageFormat.CSV):
+            file_path = self.get_file_path(year, storage_format)
+            if file_path.exists():
+                return file_path
+        raise FileNotFoundError(f"No cleaned trade data for year {year} in {self.data_dir}")
+
+    def load_trade_data(
+            self,
+            year: int,
+            columns: list[str] | None = None,
+            filters: Filters | None = None
+    ) -> pd.DataFrame:
         """
         Carga los datos de comercio para el año especificado.
 
         Args:
             year (int): El año para el cual se deben cargar los datos.
+            columns (list[str], optional): Columnas a cargar. Por defecto producto, exportador,
+                importador y dinero.
+            filters (list, optional): Filtros en formato DNF de pyarrow, p. ej.
+                `[("exporter_iso_code_3", "in", ["ARG", "BRA"])]`. En Parquet se aplican al leer
+                (se descartan row groups completos); en CSV se aplican después de leer.
 
         Returns:
             pd.DataFrame: El DataFrame con los datos de comercio.
         """
-        file_path = Path(self.data_dir) / f"cleaned_HS92_Y{year}_V202401b.csv"
-        return pd.read_csv(
+        columns = columns or DEFAULT_TRADE_DATA_COLUMNS
+        file_path = self.find_trade_data_file(year)
+
+        if file_path.suffix == f".{StorageFormat.PARQUET.value}":
+            return pd.read_parquet(file_path, columns=columns, filters=filters)
+
+        usecols = list(dict.fromkeys(columns + self._filter_columns(filters)))
+        trade_data = pd.read_csv(
             file_path,
-            usecols=[
-                BACIColumnsTradeData.PRODUCT_CATEGORY_CODE.value,
-                BACIColumnsTradeData.EXPORTER_ISO_CODE_3.value,
-                BACIColumnsTradeData.IMPORTER_ISO_CODE_3.value,
-                BACIColumnsTradeData.MONEY.value
-            ],
+            usecols=usecols,
+            dtype={column: TRADE_DATA_DTYPES[column] for column in usecols if column in TRADE_DATA_DTYPES},
             low_memory=False
-        )
\ No newline at end of file
+        )
+        if filters:
+            trade_data = trade_data[self._filters_mask(trade_data, filters)].reset_index(drop=True)
+        return trade_data[columns]
+
+    def load_panel(
+            self,
+            start_year: int,
+            end_year: int,
+            exporters: list[str] | None = None,
+            importers: list[str] | None = None,
+            products: list[int] | None = None,
+            hs_prefixes: list[str] | None = None,
+            columns: list[str] | None = None
+    ) -> pd.DataFrame:
+        """
+        Carga un rango de años en una sola tabla, leyendo solo las filas que cumplen los filtros.
+
+        Los filtros se traducen a filtros DNF de `load_trade_data`, por lo que en Parquet se aplican
+        al leer cada archivo.
+
+        Args:
+            start_year (int): Primer año del panel.
+            end_year (int): Último año del panel (incluido).
+            exporters (list[str], optional): Códigos ISO3 de los exportadores a conservar.
+            importers (list[str], optional): Códigos ISO3 de los importadores a conservar.
+            products (list[int], optional): Códigos HS6 de los productos a conservar.
+            hs_prefixes (list[str], optional): Prefijos HS (p. ej. "27" o "8703"); se conservan los
+                productos que empiezan por alguno de ellos.
+            columns (list[str], optional): Columnas a cargar. Por defecto las de `load_trade_data`.
+
+        Returns:
+            pd.DataFrame: Los datos de todos los años con una columna `year` (int16). Las columnas
+            categóricas comparten las mismas categorías en todos los años.
+
+        Raises:
+            ValueError: Si el rango de años está vacío.
+            FileNotFoundError: Si falta el archivo limpio de algún año del rango.
+        """
+        if end_year < start_year:
+            raise ValueError(f"Empty panel: end_year ({end_year}) is before start_year ({start_year})")
+
+        year = BACIColumnsTradeData.YEAR.value
+        columns = [column for column in columns or DEFAULT_TRADE_DATA_COLUMNS if column != year]
+        filters = self.panel_filters(exporters, importers, products, hs_prefixes)
+
+        yearly_data = []
+        for panel_year in range(start_year, end_year + 1):
+            trade_data = self.load_trade_data(panel_year, columns=columns, filters=filters)
+            trade_data.insert(0, year, pd.Series(panel_year, index=trade_data.index, dtype=TRADE_DATA_DTYPES[year]))
+            yearly_data.append(trade_data)
+
+        # Se unifican las categorías para que la concatenación conserve las columnas categóricas
+        for column in yearly_data[0].columns:
+            if isinstance(yearly_data[0][column].dtype, pd.CategoricalDtype):
+                categories = pd.api.types.union_categoricals(
+                    [trade_data[column] for trade_data in yearly_data], ignore_order=True
+                ).categories
+                for trade_data in yearly_data:
+                    trade_data[column] = trade_data[column].cat.set_categories(categories)
+
+        return pd.concat(yearly_data, ignore_index=True)
+
+    @staticmethod
+    def panel_filters(
+            exporters: list[str] | None = None,
+            importers: list[str] | None = None,
+            products: list[int] | None = None,
+            hs_prefixes: list[str] | None = None
+    ) -> list[list[tuple]] | None:
+        """
+        Construye los filtros DNF de un panel. Cada prefijo HS es un rango de códigos HS6.
+        """
+        conjunction = []
+        if exporters:
+            conjunction.append((BACIColumnsTradeData.EXPORTER_ISO_CODE_3.value, "in", list(exporters)))
+        if importers:
+            conjunction.append((BACIColumnsTradeData.IMPORTER_ISO_CODE_3.value, "in", list(importers)))
+        if products:
+            conjunction.append((BACIColumnsTradeData.PRODUCT_CATEGORY_CODE.value, "in", [int(product) for product in products]))
+
+        if not hs_prefixes:
+            return [conjunction] if conjunction else None
+
+        product = BACIColumnsTradeData.PRODUCT_CATEGORY_CODE.value
+        filters = []
+        for hs_prefix in hs_prefixes:
+            width = 10 ** (6 - len(hs_prefix))
+            first_code = int(hs_prefix) * width
+            filters.append(conjunction + [(product, ">=", first_code), (product, "<=", first_code + width - 1)])
+        return filters
+
+    def save_trade_data(
+            self,
+            trade_data: pd.DataFrame,
+            year: int,
+            storage_format: StorageFormat = StorageFormat.PARQUET
+    ) -> Path:
+        """
+        Guarda los datos limpios de un año con los tipos de `TRADE_DATA_DTYPES`.
+
+        En Parquet los datos se ordenan por exportador e importador para que las estadísticas
+        de los row groups sean selectivas.
+
+        Args:
+            trade_data (pd.DataFrame): Los datos limpios del año.
+            year (int): El año de los datos.
+            storage_format (StorageFormat): Formato de almacenamiento. Por defecto Parquet.
+
+        Returns:
+            Path: La ruta del archivo escrito.
+        """
+        file_path = self.get_file_path(year, storage_format)
+        trade_data = self.cast_trade_data(trade_data)
+
+        if storage_format == StorageFormat.PARQUET:
+            trade_data.sort_values(
+                [BACIColumnsTradeData.EXPORTER_ISO_CODE_3.value, BACIColumnsTradeData.IMPORTER_ISO_CODE_3.value]
+            ).to_parquet(file_path, index=False, row_group_size=PARQUET_ROW_GROUP_SIZE)
+        else:
+            trade_data.to_csv(file_path, index=False)
+        return file_path
+
+    def open_writer(
+            self,
+            year: int,
+            storage_format: StorageFormat = StorageFormat.PARQUET,
+            sort_buffer_rows: int = SORT_BUFFER_ROWS
+    ) -> "TradeDataWriter":
+        """
+        Abre un escritor para guardar los datos limpios de un año por partes.
+        """
+        return TradeDataWriter(self.get_file_path(year, storage_format), storage_format, sort_buffer_rows)
+
+    @staticmethod
+    def cast_trade_data(trade_data: pd.DataFrame) -> pd.DataFrame:
+        """
+        Convierte las columnas conocidas de los datos de comercio a sus tipos explícitos.
+        """
+        return trade_data.astype(
+            {column: dtype for column, dtype in TRADE_DATA_DTYPES.items() if column in trade_data.columns}
+        )
+
+    @staticmethod
+    def _as_dnf(filters: Filters | None) -> list[list[tuple]]:
+        if not filters:
+            return []
+        if isinstance(filters[0], tuple):
+            return [filters]
+        return filters
+
+    @staticmethod
+    def _filter_columns(filters: Filters | None) -> list[str]:
+        return [column for conjunction in TradeDataLoader._as_dnf(filters) for column, _, _ in conjunction]
+
+    @staticmethod
+    def _filters_mask(trade_data: pd.DataFrame, filters: Filters) -> pd.Series:
+        """
+        Evalúa filtros en formato DNF de pyarrow sobre un DataFrame ya cargado.
+        """
+        filters = TradeDataLoader._as_dnf(filters)
+
+        comparisons = {
+            "==": lambda column, value: column == value,
+            "=": lambda column, value: column == value,
+            "!=": lambda column, value: column != value,
+            "<": lambda column, value: column < value,
+            "<=": lambda column, value: column <= value,
+            ">": lambda column, value: column > value,
+            ">=": lambda column, value: column >= value,
+            "in": lambda column, value: column.isin(value),
+            "not in": lambda column, value: ~column.isin(value),
+        }
+
+        mask = pd.Series(False, index=trade_data.index)
+        for conjunction in filters:
+            conjunction_mask = pd.Series(True, index=trade_data.index)
+            for column, operator, value in conjunction:
+                conjunction_mask &= comparisons[operator](trade_data[column], value)
+            mask |= conjunction_mask
+        return mask
+
+
+class TradeDataWriter:
+    """
+    Escribe los datos limpios de un año por partes, sin mantener el año completo en memoria.
+
+    Cada parte se convierte a los tipos de `TRADE_DATA_DTYPES` y se escribe primero a un archivo
+    temporal; el archivo final solo se crea al cerrar el escritor sin errores, de modo que un año
+    interrumpido no deja un archivo limpio truncado. En Parquet, al cerrar, las partes se reescriben
+    ordenadas por exportador e importador, por grupos de exportadores consecutivos de alrededor de
+    `sort_buffer_rows` filas, de modo que los row groups del archivo final cubran rangos de
+    exportadores que no se solapan.
+    """
+    def __init__(
+            self,
+            file_path: Path,
+            storage_format: StorageFormat,
+            sort_buffer_rows: int = SORT_BUFFER_ROWS
+    ):
+        self.file_path = file_path
+        self.storage_format = storage_format
+        self.sort_buffer_rows = sort_buffer_rows
+        self._partial_path = file_path.with_name(f"{file_path.name}.partial")
+        self._sorted_path = file_path.with_name(f"{file_path.name}.sorted")
+        self._parquet_writer: pq.ParquetWriter | None = None
+        self._schema: pa.Schema | None = None
+        self._write_header = True
+
+    def __enter__(self) -> "TradeDataWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def write(self, trade_data: pd.DataFrame) -> None:
+        """
+        Agrega una parte de los datos limpios al archivo.
+        """
+        trade_data = TradeDataLoader.cast_trade_data(trade_data)
+
+        if self.storage_format == StorageFormat.CSV:
+            trade_data.to_csv(self._partial_path, mode="w" if self._write_header else "a", header=self._write_header, index=False)
+            self._write_header = False
+            return
+
+        if self._parquet_writer is None:
+            # El ancho de los índices de las categorías depende de cada parte; se fija en int32 para
+            # que todas las partes compartan el mismo esquema
+            self._schema = pa.Schema.from_pandas(trade_data, preserve_index=False)
+            for position, field in enumerate(self._schema):
+                if pa.types.is_dictionary(field.type):
+                    self._schema = self._schema.set(
+                        position, pa.field(field.name, pa.dictionary(pa.int32(), field.type.value_type))
+                    )
+            self._parquet_writer = pq.ParquetWriter(self._partial_path, self._schema)
+
+        self._parquet_writer.write_table(pa.Table.from_pandas(trade_data, schema=self._schema, preserve_index=False))
+
+    def close(self) -> None:
+        """
+        Termina el archivo: lo ordena (en Parquet) y lo mueve a `file_path`.
+        """
+        if self.storage_format == StorageFormat.CSV:
+            if not self._write_header:
+                os.replace(self._partial_path, self.file_path)
+            return
+        if self._parquet_writer is None:
+            return
+        self._parquet_writer.close()
+        self._parquet_writer = None
+        try:
+            self._write_sorted()
+            os.replace(self._sorted_path, self.file_path)
+        finally:
+            self._partial_path.unlink(missing_ok=True)
+            self._sorted_path.unlink(missing_ok=True)
+
+    def abort(self) -> None:
+        """
+        Descarta lo escrito sin crear el archivo final.
+        """
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+            self._parquet_writer = None
+        self._partial_path.unlink(missing_ok=True)
+        self._sorted_path.unlink(missing_ok=True)
+
+    def _write_sorted(self) -> None:
+        """
+        Reescribe el archivo temporal ordenado por exportador e importador, un grupo de exportadores
+        consecutivos a la vez, en `_sorted_path`.
+        """
+        exporter = BACIColumnsTradeData.EXPORTER_ISO_CODE_3.value
+        exporter_counts = (
+            pq.read_table(self._partial_path, columns=[exporter]).column(exporter)
+            .to_pandas().astype(str).value_counts(dropna=False).sort_index()
+        )
+        # Un exportador con más filas que el buffer forma un grupo por sí solo
+        group_ids = (exporter_counts.cumsum() - 1) // self.sort_buffer_rows
+        exporter_groups = exporter_counts.index.groupby(group_ids.to_numpy()).values()
+
+        unsorted_file = pq.ParquetFile(self._partial_path)
+        with pq.ParquetWriter(self._sorted_path, self._schema) as parquet_writer:
+            for exporters in exporter_groups:
+                trade_data = pd.concat(
+                    [
+                        batch[batch[exporter].astype(str).isin(exporters)]
+                        for batch in (batch.to_pandas() for batch in unsorted_file.iter_batches())
+                    ],
+                    ignore_index=True
+                )
+                # Las categorías difieren entre partes; la concatenación las deja como objetos
+                trade_data = self.sort_trade_data(TradeDataLoader.cast_trade_data(trade_data))
+                parquet_writer.write_table(
+                    pa.Table.from_pandas(trade_data, schema=self._schema, preserve_index=False),
+                    row_group_size=PARQUET_ROW_GROUP_SIZE
+                )
+
+    @staticmethod
+    def sort_trade_data(trade_data: pd.DataFrame) -> pd.DataFrame:
+        """
+        Ordena por exportador e importador según sus códigos ISO3 (no según el orden de las categorías).
+        """
+        columns = [BACIColumnsTradeData.EXPORTER_ISO_CODE_3.value, BACIColumnsTradeData.IMPORTER_ISO_CODE_3.value]
+        return trade_data.sort_values(columns, key=lambda column: column.astype(str), ignore_index=True)
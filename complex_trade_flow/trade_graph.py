@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import networkx as nx
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from .constants import BACIColumnsTradeData
+from .trade_tensor import EXPORTER, IMPORTER
+
+if TYPE_CHECKING:
+    from .networks import TradeNetwork
+
+# Atributos de nodo usados por el análisis centro-periferia (mismos nombres que en el sandbox)
+PROPENSITY = "propension"
+INCOME = "ingreso"
+
+
+class TradeGraph:
+    """
+    Grafo dirigido y ponderado de comercio entre países: matriz de adyacencia dispersa (CSR) con las
+    etiquetas de sus nodos y atributos de nodo como arreglos alineados con esas etiquetas.
+
+    El peso de la arista i -> j es el valor exportado por i a j. Solo se construye un grafo de
+    NetworkX cuando se pide con `to_networkx`.
+    """
+
+    def __init__(
+            self,
+            adjacency: sparse.spmatrix,
+            nodes: pd.Index,
+            node_attributes: dict[str, np.ndarray] | None = None
+    ):
+        self.adjacency = sparse.csr_matrix(adjacency)
+        self.nodes = pd.Index(nodes)
+        self.node_attributes = node_attributes or {}
+
+    def __len__(self):
+        return len(self.nodes)
+
+    @classmethod
+    def from_edges(
+            cls,
+            edges: pd.DataFrame,
+            source: str = BACIColumnsTradeData.EXPORTER_ISO_CODE_3.value,
+            target: str = BACIColumnsTradeData.IMPORTER_ISO_CODE_3.value,
+            weight: str = BACIColumnsTradeData.MONEY.value
+    ) -> "TradeGraph":
+        """
+        Construye el grafo a partir de una tabla de aristas (p. ej. los flujos agregados por exportador
+        e importador). Las aristas repetidas se suman y las filas sin país se descartan.
+
+        Args:
+            edges (pd.DataFrame): La tabla de aristas.
+            source (str): Columna del país de origen.
+            target (str): Columna del país de destino.
+            weight (str): Columna con el peso de la arista.
+
+        Returns:
+            TradeGraph: El grafo, con los nodos ordenados.
+        """
+        nodes = pd.Index(pd.concat([edges[source], edges[target]]).dropna().unique()).sort_values()
+        sources, targets = nodes.get_indexer(edges[source]), nodes.get_indexer(edges[target])
+        valid = (sources >= 0) & (targets >= 0)
+        adjacency = sparse.coo_matrix(
+            (edges[weight].to_numpy(dtype=np.float64)[valid], (sources[valid], targets[valid])),
+            shape=(len(nodes), len(nodes))
+        )
+        return cls(adjacency.tocsr(), nodes)
+
+    @classmethod
+    def from_trade_network(
+            cls,
+            trade_network: TradeNetwork,
+            weight: str = BACIColumnsTradeData.MONEY.value
+    ) -> "TradeGraph":
+        """
+        Construye el grafo exportador -> importador de una red, sumando sobre los productos con el
+        tensor disperso de la red. El país faltante (NaN), si existe, se descarta.
+        """
+        tensor = trade_network.trade_tensor()
+        graph = cls(tensor.matrix(EXPORTER, IMPORTER, weight), tensor.labels[EXPORTER])
+        return graph.subgraph(graph.nodes.notna())
+
+    def set_node_attribute(self, name: str, values: pd.Series | np.ndarray) -> None:
+        """
+        Asigna un atributo de nodo.
+
+        Args:
+            name (str): El nombre del atributo.
+            values (pd.Series | np.ndarray): Una Series indexada por país (se alinea con los nodos; los
+                nodos sin valor quedan en NaN) o un arreglo en el orden de `nodes`.
+        """
+        if isinstance(values, pd.Series):
+            values = values.reindex(self.nodes)
+        self.node_attributes[name] = np.asarray(values, dtype=np.float64)
+
+    def subgraph(self, nodes: np.ndarray) -> "TradeGraph":
+        """
+        Conserva solo algunos nodos, con sus aristas y atributos.
+
+        Args:
+            nodes (np.ndarray): Máscara booleana o posiciones de los nodos a conservar.
+
+        Returns:
+            TradeGraph: El subgrafo.
+        """
+        positions = np.flatnonzero(nodes) if np.asarray(nodes).dtype == bool else np.asarray(nodes)
+        return TradeGraph(
+            self.adjacency[positions][:, positions],
+            self.nodes[positions],
+            {name: values[positions] for name, values in self.node_attributes.items()}
+        )
+
+    def complete_nodes(self, attributes: list[str]) -> np.ndarray:
+        """
+        Máscara de los nodos que tienen todos los atributos indicados.
+        """
+        mask = np.ones(len(self), dtype=bool)
+        for attribute in attributes:
+            mask &= ~np.isnan(self.node_attributes[attribute])
+        return mask
+
+    def normalize(self) -> "TradeGraph":
+        """
+        Divide el peso de cada arista por el total de su nodo de origen, como `RedComercial.normalizar`
+        en el sandbox. Los nodos sin aristas salientes quedan con una fila de ceros.
+
+        Returns:
+            TradeGraph: El grafo normalizado, con los mismos nodos y atributos.
+        """
+        row_totals = np.asarray(self.adjacency.sum(axis=1)).ravel()
+        scale = np.divide(1.0, row_totals, out=np.zeros_like(row_totals), where=row_totals != 0)
+        return TradeGraph(sparse.diags(scale) @ self.adjacency, self.nodes, dict(self.node_attributes))
+
+    def to_networkx(self) -> nx.DiGraph:
+        """
+        Construye el grafo de NetworkX equivalente, con los pesos en el atributo `weight` de cada
+        arista y los atributos de nodo.
+        """
+        graph = nx.relabel_nodes(
+            nx.from_scipy_sparse_array(self.adjacency, create_using=nx.DiGraph()),
+            dict(enumerate(self.nodes))
+        )
+        for name, values in self.node_attributes.items():
+            nx.set_node_attributes(graph, dict(zip(self.nodes, values.tolist())), name)
+        return graph
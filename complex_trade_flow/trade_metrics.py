@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import numpy as np
+from pandas import DataFrame
+
+from .constants import BACIColumnsTradeData
+from .diversity_metrics import DiversityCalculator
+
+if TYPE_CHECKING:
+    from .networks import TradeNetwork
+
+
+class TradeMetricsCalculator:
+    """
+    Computes the trade metrics of `EconomicDiversityAnalyzer.compute_entity_trade_metrics` for every
+    entity of a classification scheme from a single aggregation of the classified trade table.
+    """
+
+    @staticmethod
+    def aggregate_trade_data(trade_network: TradeNetwork, scheme_name: str) -> DataFrame:
+        """
+        Aggregates money and mass by (exporter entity, importer entity, product).
+
+        Every metric is a reduction of this table, which is much smaller than the trade data
+        for classification schemes that group countries.
+
+        Args:
+            trade_network (TradeNetwork): The trade network with the scheme applied.
+            scheme_name (str): The classification scheme name.
+
+        Returns:
+            DataFrame: The aggregated flows, one row per (exporter, importer, product).
+        """
+        data = trade_network.filter_data_by_entities(scheme_name=scheme_name, decode=False)
+        return data.groupby(
+            [f"{scheme_name}_exporter", f"{scheme_name}_importer", BACIColumnsTradeData.PRODUCT_CATEGORY_CODE.value],
+            observed=True,
+            dropna=False
+        )[[BACIColumnsTradeData.MONEY.value, BACIColumnsTradeData.MASS.value]].sum().reset_index()
+
+    @staticmethod
+    def calculate_trade_metrics_by_entity(trade_network: TradeNetwork, scheme_name: str) -> DataFrame:
+        """
+        Calculates, for every entity of the scheme:
+        - Money gained through exports
+        - Money lost through imports
+        - Mass gained through imports
+        - Mass lost through exports
+        - Entropy metrics for imports and exports
+        - Center/periphery level
+
+        Args:
+            trade_network (TradeNetwork): The trade network with the scheme applied.
+            scheme_name (str): The classification scheme name.
+
+        Returns:
+            DataFrame: One row per entity with the same columns as `compute_entity_trade_metrics`.
+        """
+        money = BACIColumnsTradeData.MONEY.value
+        mass = BACIColumnsTradeData.MASS.value
+        exporter = f"{scheme_name}_exporter"
+        importer = f"{scheme_name}_importer"
+
+        aggregated_data = TradeMetricsCalculator.aggregate_trade_data(trade_network, scheme_name)
+        entities = list(trade_network.entities[scheme_name])
+
+        def by_entity(series, fill_value):
+            series.index = trade_network.decode_entities(scheme_name, series.index)
+            return series.reindex(entities, fill_value=fill_value).to_numpy()
+
+        exports = aggregated_data.groupby(exporter, observed=True, dropna=False)[[money, mass]].sum()
+        imports = aggregated_data.groupby(importer, observed=True, dropna=False)[[money, mass]].sum()
+        money_gain_exportation = by_entity(exports[money], 0.0)
+        money_loss_importation = by_entity(imports[money], 0.0)
+
+        def entropy(group, column):
+            return by_entity(
+                DiversityCalculator.calculate_diversity_index_by_group(
+                    data=aggregated_data,
+                    group=group,
+                    column=column
+                ),
+                1.0
+            )
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            center_periphery_level = np.where(
+                money_loss_importation > 0,
+                money_gain_exportation / money_loss_importation,
+                float("inf")
+            )
+
+        return DataFrame({
+            scheme_name: entities,
+            "MONEY_GAIN_EXPORTATION": money_gain_exportation,
+            "MONEY_LOSS_IMPORTATION": money_loss_importation,
+            "MASS_GAIN_IMPORTATION": by_entity(imports[mass], 0.0),
+            "MASS_LOSS_EXPORTATION": by_entity(exports[mass], 0.0),
+            "ENTROPY_MONEY_LOSS_EXPORTATION": entropy(exporter, money),
+            "ENTROPY_MONEY_GAIN_IMPORTATION": entropy(importer, money),
+            "ENTROPY_MASS_LOSS_EXPORTATION": entropy(exporter, mass),
+            "ENTROPY_MASS_GAIN_IMPORTATION": entropy(importer, mass),
+            "CENTER_PERIPHERY_LEVEL": center_periphery_level,
+        })
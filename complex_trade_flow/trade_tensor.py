@@ -0,0 +1,151 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from .constants import BACIColumnsTradeData
+from .utils import CodeDictionary
+
+EXPORTER = "exporter"
+IMPORTER = "importer"
+PRODUCT = "product"
+
+
+class TradeTensor:
+    """
+    Tensor disperso exportador × importador × producto de un año de comercio.
+
+    Guarda en formato de coordenadas (COO) el código de cada eje y los valores (dinero y masa) de
+    cada flujo. Exportadores e importadores comparten las etiquetas de países, de modo que las
+    matrices exportador × importador son cuadradas. Las marginales, matrices y cortes recorren
+    los flujos una sola vez (O(nnz)).
+    """
+    AXES = (EXPORTER, IMPORTER, PRODUCT)
+
+    def __init__(
+            self,
+            coordinates: dict[str, np.ndarray],
+            labels: dict[str, pd.Index],
+            values: dict[str, np.ndarray]
+    ):
+        self.coordinates = coordinates
+        self.labels = labels
+        self.values = values
+
+    @classmethod
+    def from_trade_data(
+            cls,
+            trade_data: pd.DataFrame,
+            countries: CodeDictionary | None = None,
+            products: CodeDictionary | None = None
+    ) -> "TradeTensor":
+        """
+        Construye el tensor a partir de la tabla larga de comercio.
+
+        Args:
+            trade_data (pd.DataFrame): Los datos de comercio con exportador, importador, producto y
+                las columnas de valores disponibles (dinero y/o masa).
+            countries (CodeDictionary, optional): Diccionario de países con el que ya están codificadas
+                las columnas de exportador e importador (red compacta). Si es None se construye uno.
+            products (CodeDictionary, optional): Igual que `countries` para la columna de productos.
+
+        Returns:
+            TradeTensor: El tensor del año.
+        """
+        exporter = trade_data[BACIColumnsTradeData.EXPORTER_ISO_CODE_3.value]
+        importer = trade_data[BACIColumnsTradeData.IMPORTER_ISO_CODE_3.value]
+        product = trade_data[BACIColumnsTradeData.PRODUCT_CATEGORY_CODE.value]
+
+        if countries is None:
+            countries = CodeDictionary(pd.Index(exporter.unique()).append(pd.Index(importer.unique())))
+            exporter, importer = countries.encode(exporter), countries.encode(importer)
+        if products is None:
+            products = CodeDictionary(product.unique())
+            product = products.encode(product)
+
+        value_columns = [
+            column for column in (BACIColumnsTradeData.MONEY.value, BACIColumnsTradeData.MASS.value)
+            if column in trade_data.columns
+        ]
+        return cls(
+            coordinates={
+                EXPORTER: np.asarray(exporter),
+                IMPORTER: np.asarray(importer),
+                PRODUCT: np.asarray(product),
+            },
+            labels={EXPORTER: countries.labels, IMPORTER: countries.labels, PRODUCT: products.labels},
+            values={column: trade_data[column].to_numpy(dtype=np.float64) for column in value_columns}
+        )
+
+    @property
+    def shape(self) -> tuple[int, int, int]:
+        return tuple(len(self.labels[axis]) for axis in self.AXES)
+
+    @property
+    def nnz(self) -> int:
+        return len(self.coordinates[EXPORTER])
+
+    @property
+    def nbytes(self) -> int:
+        return sum(array.nbytes for array in (*self.coordinates.values(), *self.values.values()))
+
+    def marginal(self, axis: str, value: str = BACIColumnsTradeData.MONEY.value) -> pd.Series:
+        """
+        Suma los valores sobre los otros dos ejes.
+
+        Args:
+            axis (str): "exporter", "importer" o "product".
+            value (str): La columna de valores ("money" o "mass").
+
+        Returns:
+            pd.Series: El total de cada etiqueta del eje (0 si no tiene flujos).
+        """
+        totals = np.bincount(
+            self.coordinates[axis], weights=self.values[value], minlength=len(self.labels[axis])
+        )
+        return pd.Series(totals, index=self.labels[axis], name=value)
+
+    def matrix(
+            self,
+            rows: str = EXPORTER,
+            columns: str = IMPORTER,
+            value: str = BACIColumnsTradeData.MONEY.value
+    ) -> sparse.csr_matrix:
+        """
+        Suma los valores sobre el eje restante y devuelve la matriz dispersa de dos ejes.
+
+        Las filas y columnas siguen el orden de `labels[rows]` y `labels[columns]`.
+
+        Args:
+            rows (str): El eje de las filas.
+            columns (str): El eje de las columnas.
+            value (str): La columna de valores ("money" o "mass").
+
+        Returns:
+            sparse.csr_matrix: La matriz con los flujos repetidos sumados.
+        """
+        return sparse.coo_matrix(
+            (self.values[value], (self.coordinates[rows], self.coordinates[columns])),
+            shape=(len(self.labels[rows]), len(self.labels[columns]))
+        ).tocsr()
+
+    def slice(self, axis: str, labels) -> "TradeTensor":
+        """
+        Conserva solo los flujos cuyas etiquetas en `axis` están en `labels`.
+
+        Las etiquetas de los ejes no cambian, así que los resultados del corte se pueden alinear
+        con los del tensor completo.
+
+        Args:
+            axis (str): El eje a cortar.
+            labels: Las etiquetas a conservar; las desconocidas se ignoran.
+
+        Returns:
+            TradeTensor: El tensor restringido.
+        """
+        codes = self.labels[axis].get_indexer(list(labels))
+        mask = np.isin(self.coordinates[axis], codes[codes >= 0])
+        return TradeTensor(
+            coordinates={name: coordinates[mask] for name, coordinates in self.coordinates.items()},
+            labels=self.labels,
+            values={name: values[mask] for name, values in self.values.items()}
+        )
@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 
 
@@ -57,3 +58,46 @@ class ClassificationScheme:
         return {country: self.classification_data.get(country, 'Unknown') for country in countries}
 
 
+class CodeDictionary:
+    """
+    Diccionario compartido entre etiquetas (países, productos, entidades) y códigos enteros pequeños.
+
+    Los códigos son la posición de la etiqueta en `labels`; las etiquetas desconocidas se codifican como -1.
+    """
+    def __init__(self, labels):
+        self.labels = pd.Index(labels).unique().sort_values()
+        self.dtype = np.int16 if len(self.labels) < np.iinfo(np.int16).max else np.int32
+
+    def __len__(self):
+        return len(self.labels)
+
+    def encode(self, values) -> np.ndarray:
+        """
+        Convierte etiquetas a códigos enteros.
+
+        Args:
+            values: Las etiquetas a codificar (Series, Categorical o iterable).
+
+        Returns:
+            np.ndarray: Los códigos, de tipo `self.dtype`.
+        """
+        if isinstance(values, pd.Series) and isinstance(values.dtype, pd.CategoricalDtype):
+            # Solo se buscan las categorías; las filas se traducen con un take sobre sus códigos
+            category_codes = np.append(
+                self.labels.get_indexer(values.cat.categories),
+                self.labels.get_indexer([np.nan])
+            )
+            return category_codes[values.cat.codes.to_numpy()].astype(self.dtype)
+        return self.labels.get_indexer(values).astype(self.dtype)
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        """
+        Convierte códigos enteros a sus etiquetas; los códigos -1 se devuelven como NaN.
+        """
+        codes = np.asarray(codes)
+        labels = self.labels.to_numpy()[codes]
+        missing = codes < 0
+        if missing.any():
+            labels = labels.astype(object)
+            labels[missing] = np.nan
+        return labels
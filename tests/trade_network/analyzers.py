@@ -0,0 +1,174 @@
+import json
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from complex_trade_flow.analyzers import CenterPeripheryAnalyzer, EconomicDiversityAnalyzer, select_shared_folder
+from complex_trade_flow.constants import EconomicComplexity
+from complex_trade_flow.indicators import IndicatorStore
+from complex_trade_flow.networks import TradeNetwork, TradeNetworkCache
+from complex_trade_flow.trade_data_loader import TradeDataLoader
+from complex_trade_flow.trade_metrics import TradeMetricsCalculator
+from complex_trade_flow.utils import ClassificationScheme
+
+
+def _save_years(directory, years, n_rows=3000):
+    rng = np.random.default_rng(0)
+    for year in years:
+        TradeDataLoader(directory).save_trade_data(pd.DataFrame({
+            "product_category_code": rng.integers(0, 60, n_rows),
+            "exporter_iso_code_3": [f"C{code:02d}" for code in rng.integers(0, 25, n_rows)],
+            "importer_iso_code_3": [f"C{code:02d}" for code in rng.integers(0, 25, n_rows)],
+            "money": rng.lognormal(size=n_rows),
+        }), year)
+
+
+def test_fitness_warm_start_matches_cold_start(tmp_path):
+    _save_years(tmp_path, [2000, 2001])
+    schemes = [ClassificationScheme(name="SinPaís")]
+    fitness = EconomicComplexity.FITNESS_COMPLEXITY
+
+    warm_analyzer = EconomicDiversityAnalyzer(2000, 2001, schemes)
+    warm_analyzer.analyze_year(2000, "SinPaís", fitness, base_directory=tmp_path)
+    warm = warm_analyzer.analyze_year(2001, "SinPaís", fitness, base_directory=tmp_path)
+    cold = EconomicDiversityAnalyzer(2001, 2001, schemes).analyze_year(2001, "SinPaís", fitness, base_directory=tmp_path)
+
+    assert warm.attrs["iterations"] < cold.attrs["iterations"]
+    pd.testing.assert_series_equal(warm["FITNESS"], cold["FITNESS"], rtol=1e-6)
+
+
+def test_run_analysis_resumes_until_inputs_change(tmp_path):
+    data_directory, output_directory = tmp_path / "data", tmp_path / "output"
+    data_directory.mkdir()
+    _save_years(data_directory, [2000, 2001])
+    analyzer = EconomicDiversityAnalyzer(2000, 2001, [ClassificationScheme(name="SinPaís")])
+    diversification = EconomicComplexity.ENTITY_PRODUCT_DIVERSIFICATION
+
+    def output_times():
+        return {path.name: path.stat().st_mtime_ns for path in (output_directory / diversification.value).iterdir()}
+
+    analyzer.run_analysis(diversification, output_directory, data_directory)
+    first_run = output_times()
+    analyzer.run_analysis(diversification, output_directory, data_directory)
+    assert output_times() == first_run
+
+    # Cambiar el archivo de un año o una opción del análisis invalida solo las unidades afectadas
+    _save_years(data_directory, [2001], n_rows=2000)
+    analyzer.run_analysis(diversification, output_directory, data_directory)
+    second_run = output_times()
+    assert [name for name in second_run if second_run[name] != first_run[name]] == ["SinPaís_compute_entity_product_diversification_2001.csv"]
+
+    analyzer.run_analysis(diversification, output_directory, data_directory, vectorized=False)
+    assert all(time != second_run[name] for name, time in output_times().items())
+
+
+def test_center_periphery_analysis_end_to_end(tmp_path):
+    rng = np.random.default_rng(0)
+    countries = np.array([f"C{code:02d}" for code in range(12)])
+    size = np.linspace(3, 0.2, len(countries))
+    for year in (2000, 2001):
+        exporters = rng.choice(len(countries), 3000, p=size / size.sum())
+        importers = rng.choice(len(countries), 3000, p=size / size.sum())
+        TradeDataLoader(tmp_path).save_trade_data(pd.DataFrame({
+            "product_category_code": rng.integers(0, 50, 3000),
+            "exporter_iso_code_3": countries[exporters],
+            "importer_iso_code_3": countries[importers],
+            "money": rng.lognormal(size=3000) * size[exporters],
+        }), year)
+    income = size * 1e11
+    income[-1] = np.nan  # C11 no tiene ingreso y queda fuera del análisis
+    for indicator, values in (("NE.IMP.GNFS.ZS", rng.uniform(15, 40, len(countries))), ("NY.GDP.MKTP.CD", income)):
+        pd.DataFrame({
+            "countryiso3code": np.tile(countries, 2),
+            "date": np.repeat([2000, 2001], len(countries)),
+            "value": np.tile(values, 2),
+        }).to_csv(tmp_path / f"{indicator}_1995-2022.csv", index=False)
+    analyzer = CenterPeripheryAnalyzer(2000, 2001, IndicatorStore(tmp_path), n_jobs=2)
+
+    result = analyzer.analyze_year(2000, tmp_path)
+    assert result["countries"] == list(countries[:-1])
+    level_nodes = [node for level in result["levels"].values() for node in level["nodos"]]
+    assert len(level_nodes) == len(set(level_nodes)) and set(level_nodes) <= set(result["countries"])
+    assert "C00" in result["levels"][0]["nodos"]
+    assert all(level["balance_poder"] > 0 for level in result["levels"].values())
+
+    output_files = analyzer.run_analysis(tmp_path / "output", tmp_path)
+    assert [os.path.basename(path) for path in output_files] == ["center_periphery_2000.json", "center_periphery_2001.json"]
+    with open(output_files[0]) as file:
+        assert json.load(file) == json.loads(json.dumps(result, default=float))
+
+
+def test_shared_folder_falls_back_when_full(tmp_path, monkeypatch):
+    assert select_shared_folder(1024, str(tmp_path)) == str(tmp_path)
+    assert select_shared_folder(2 ** 62, str(tmp_path)) == tempfile.gettempdir()
+    assert select_shared_folder(1024, str(tmp_path / "missing")) == tempfile.gettempdir()
+    monkeypatch.setenv("SHARED_MEMORY_DIR", str(tmp_path))
+    assert select_shared_folder(1024) == str(tmp_path)
+
+
+def _analyze_both_ways(tmp_path, type_analysis):
+    rng = np.random.default_rng(3)
+    countries = np.array([f"C{code:02d}" for code in range(8)] + [None], dtype=object)
+    TradeDataLoader(tmp_path).save_trade_data(pd.DataFrame({
+        "product_category_code": rng.integers(0, 15, 400),
+        "exporter_iso_code_3": rng.choice(countries, 400),
+        "importer_iso_code_3": rng.choice(countries, 400),
+        "money": rng.lognormal(size=400),
+        "mass": rng.lognormal(size=400),
+    }), 2000)
+    pd.DataFrame({"id": countries[:-1], "region": list("ABC") * 2 + ["A", "B"]}).to_csv(tmp_path / "regions.csv", index=False)
+    schemes = [
+        ClassificationScheme(name="SinPaís"),
+        ClassificationScheme("by_region", str(tmp_path / "regions.csv"), "id", "region"),
+    ]
+    analyzer = EconomicDiversityAnalyzer(2000, 2000, schemes, n_jobs=2, chunk_size=3)
+    for scheme in schemes:
+        results = [
+            analyzer.analyze_year(2000, scheme.name, type_analysis, base_directory=tmp_path, vectorized=vectorized)
+            for vectorized in (True, False)
+        ]
+        yield [result.sort_values(scheme.name, na_position="last").reset_index(drop=True) for result in results]
+
+
+def test_vectorized_product_diversification_matches_per_entity(tmp_path):
+    for vectorized, per_entity in _analyze_both_ways(tmp_path, EconomicComplexity.ENTITY_PRODUCT_DIVERSIFICATION):
+        assert len(vectorized) > 1
+        pd.testing.assert_frame_equal(vectorized, per_entity)
+
+
+def test_vectorized_trade_metrics_match_per_entity(tmp_path):
+    for vectorized, per_entity in _analyze_both_ways(tmp_path, EconomicComplexity.ENTITY_TRADE_METRICS):
+        assert vectorized[["MASS_GAIN_IMPORTATION", "MASS_LOSS_EXPORTATION"]].to_numpy().all()
+        pd.testing.assert_frame_equal(vectorized, per_entity)
+
+    # La tabla agregada conserva todo el comercio, incluidas las filas sin país
+    network = TradeNetwork.from_year(
+        2000, tmp_path, [ClassificationScheme(name="SinPaís")],
+        columns=["product_category_code", "exporter_iso_code_3", "importer_iso_code_3", "money", "mass"]
+    )
+    aggregated = TradeMetricsCalculator.aggregate_trade_data(network, "SinPaís")
+    assert aggregated["SinPaís_exporter"].isna().any()
+    assert np.allclose(aggregated[["money", "mass"]].sum(), network.trade_data[["money", "mass"]].sum())
+
+
+def test_parallel_years_match_sequential_run(tmp_path):
+    data_directory = tmp_path / "data"
+    data_directory.mkdir()
+    _save_years(data_directory, [2000, 2001, 2002])
+    analyzer = EconomicDiversityAnalyzer(2000, 2002, [ClassificationScheme(name="SinPaís")], cache=TradeNetworkCache())
+    complexity = EconomicComplexity.ECONOMIC_COMPLEXITY_INDEX
+
+    analyzer.run_analysis(complexity, tmp_path / "sequential", data_directory, max_resident_years=1)
+    assert len(analyzer.cache) == 1
+    analyzer.run_analysis(complexity, tmp_path / "parallel", data_directory, n_workers=2)
+
+    sequential, parallel = (sorted((tmp_path / run / complexity.value).iterdir()) for run in ("sequential", "parallel"))
+    assert [path.name for path in sequential] == [path.name for path in parallel] and len(sequential) == 3
+    for sequential_file, parallel_file in zip(sequential, parallel):
+        # El orden de las filas sigue al de los conjuntos de entidades, que depende del proceso
+        sequential_result, parallel_result = (
+            pd.read_csv(path).sort_values("SinPaís", ignore_index=True) for path in (sequential_file, parallel_file)
+        )
+        pd.testing.assert_frame_equal(sequential_result, parallel_result)
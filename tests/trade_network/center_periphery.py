@@ -0,0 +1,107 @@
+import numpy as np
+
+from complex_trade_flow.center_periphery import CenterPeripheryIdentifier, ElasticityCalculator, TradePowerCalculator
+
+
+def test_elasticity_matrix_matches_explicit_inverses():
+    rng = np.random.default_rng(0)
+    import_coefficients = rng.random((6, 6))
+    np.fill_diagonal(import_coefficients, 0)
+    import_coefficients /= import_coefficients.sum(axis=1, keepdims=True)
+    propensity = rng.uniform(0.1, 0.5, 6)
+    income = rng.lognormal(10, 1, 6)
+
+    income_matrix, propensity_matrix = np.diag(income), np.diag(propensity)
+    expected = (
+        income_matrix @ propensity_matrix @ import_coefficients
+        @ np.linalg.inv(np.eye(6) - propensity_matrix @ import_coefficients)
+        @ np.linalg.inv(income_matrix)
+    )
+    np.testing.assert_allclose(
+        ElasticityCalculator.calculate_elasticity_matrix(import_coefficients, propensity, income), expected
+    )
+
+
+def _relative_feedback(w, elasticities, propensity):
+    homogeneous = np.count_nonzero(w > 0) * w @ np.diag(propensity) @ w
+    return (w @ elasticities @ w) / (homogeneous / (len(w) * (1 - propensity.mean())))
+
+
+def _reference_levels(elasticities, propensity, income, nodes):
+    """Direct evaluation of every candidate center, as in sandbox/centro_periferia_refactor.py."""
+    def shares(group, remaining):
+        weights = np.where(np.isin(remaining, group), income[remaining], 0.0)
+        return weights / weights.sum()
+
+    rest_influence = [
+        elasticities[i] @ shares([j for j in range(len(nodes)) if j != i], np.arange(len(nodes)))
+        for i in range(len(nodes))
+    ]
+    order = list(np.argsort(-np.array(rest_influence), kind="stable"))
+    remaining = np.arange(len(nodes))
+    levels = {}
+    while len(order) > 2:
+        local_elasticities = elasticities[np.ix_(remaining, remaining)]
+        local_propensity = propensity[remaining]
+        best = (0.0, [])
+        for size in range(1, len(order)):
+            center, periphery = order[:size], [node for node in remaining if node not in order[:size]]
+            w_center, w_periphery = shares(center, remaining), shares(periphery, remaining)
+            balance = (
+                _relative_feedback(w_center, local_elasticities, local_propensity)
+                * (w_center @ local_elasticities @ w_periphery)
+                - _relative_feedback(w_periphery, local_elasticities, local_propensity)
+                * (w_periphery @ local_elasticities @ w_center)
+            )
+            if balance > best[0]:
+                best = (balance, list(center))
+        if not best[1]:
+            break
+        levels[len(levels)] = {"balance_poder": best[0], "nodos": [nodes[node] for node in best[1]]}
+        remaining = np.array([node for node in remaining if node not in best[1]])
+        order = [node for node in order if node not in best[1]]
+    return levels
+
+
+def test_center_periphery_identification_matches_reference():
+    for seed in range(10):
+        rng = np.random.default_rng(seed)
+        n = int(rng.integers(4, 30))
+        import_coefficients = rng.random((n, n)) * (rng.random((n, n)) < 0.6)
+        np.fill_diagonal(import_coefficients, 0)
+        import_coefficients /= np.maximum(import_coefficients.sum(axis=1, keepdims=True), 1e-12)
+        propensity = rng.uniform(0.05, 0.6, n)
+        income = rng.lognormal(10, 1.5, n)
+        nodes = [f"C{i}" for i in range(n)]
+        elasticities = ElasticityCalculator.calculate_elasticity_matrix(import_coefficients, propensity, income)
+
+        levels = CenterPeripheryIdentifier(elasticities, propensity, income, nodes).identify()
+        expected = _reference_levels(elasticities, propensity, income, nodes)
+        assert [level["nodos"] for level in levels.values()] == [level["nodos"] for level in expected.values()]
+        np.testing.assert_allclose(
+            [level["balance_poder"] for level in levels.values()],
+            [level["balance_poder"] for level in expected.values()]
+        )
+
+
+def test_trade_power_of_stacked_groups():
+    rng = np.random.default_rng(1)
+    elasticities = rng.random((8, 8))
+    propensity = rng.uniform(0.1, 0.5, 8)
+    income = rng.lognormal(10, 1, 8)
+    memberships = rng.random((8, 5)) < 0.5
+    memberships[0] = ~memberships[1]
+
+    calculator = TradePowerCalculator(elasticities, propensity)
+    centers = TradePowerCalculator.participation_matrix(income, memberships)
+    peripheries = TradePowerCalculator.participation_matrix(income, ~memberships)
+    balances = calculator.balance_of_power(centers, peripheries)
+
+    for j in range(memberships.shape[1]):
+        center, periphery = centers[:, j], peripheries[:, j]
+        assert np.isclose(calculator.influence(centers, peripheries)[j, j], center @ elasticities @ periphery)
+        expected = (
+            _relative_feedback(center, elasticities, propensity) * (center @ elasticities @ periphery)
+            - _relative_feedback(periphery, elasticities, propensity) * (periphery @ elasticities @ center)
+        )
+        assert np.isclose(balances[j], expected)
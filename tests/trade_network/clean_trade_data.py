@@ -3,9 +3,11 @@ import numpy as np
 from pathlib import Path
 import json
 
+import pandas as pd
 from pandas import DataFrame
 
 from complex_trade_flow.clean_trade_data import RawDataManager, GDPDataHandler, DataCleaner
+from complex_trade_flow.trade_data_loader import TradeDataLoader
 
 
 def test_integration():
@@ -28,4 +30,53 @@ def test_normalize_column_names():
     assert cleaned_data["money"].sum() == raw_money_sum  # sum money dont change
 
 def test_gdp_deflator():
-    pass
+    df_gdp = DataFrame({
+        "countryiso3code": ["USA", "USA", "ARG", "ARG"],
+        "date": ["1995", "2013", "1995", "2013"],
+        "value": ["50", "100", "20", "80"],
+    }, dtype="string")
+    handler = GDPDataHandler(df_gdp, base_year="2013")
+
+    assert handler.get_gdp_linked(1995) == 50.0
+    assert handler.get_gdp_linked("1995", country="ARG") == 20.0
+    assert handler.get_gdp_linked(1990) == 0.0
+
+    trade_data = DataFrame({"exporter_iso_code_3": ["ARG", "USA"], "money": [1.0, 2.0]})
+    usa_deflated = handler.to_constant_usd(trade_data.copy(), "1995")
+    assert np.allclose(usa_deflated["money"], [200.0, 400.0])
+
+    country_deflated = handler.to_constant_usd(trade_data.copy(), "1995", country_column="exporter_iso_code_3")
+    assert np.allclose(country_deflated["money"], [400.0, 400.0])
+
+
+def test_clean_trade_data_year(tmp_path, monkeypatch):
+    raw_directory, cleaned_directory = tmp_path / "raw", tmp_path / "cleaned"
+    raw_directory.mkdir()
+    cleaned_directory.mkdir()
+    monkeypatch.setenv("RAW_DATA_DIR", f"{raw_directory}/")
+    monkeypatch.setenv("cleaned_data_dir", str(cleaned_directory))
+    DataFrame({
+        "t": [2000] * 5,
+        "i": [32, 76, 32, 842, 76],
+        "j": [76, 842, 842, 32, 32],
+        "k": [10121, 10121, 20110, 30110, 20110],
+        "v": [1.0, 2.0, 3.0, 4.0, 5.0],
+        "q": ["1.5", "           NA", "2.0", "3.0", "4.0"],
+    }).to_csv(raw_directory / "BACI_HS92_Y2000_V202401b.csv", index=False)
+    country_data = DataFrame({"country_code": [32, 76, 842], "country_iso3": ["ARG", "BRA", "USA"]})
+    gdp_deflator = DataFrame({
+        "countryiso3code": ["USA", "USA"], "date": ["2000", "2013"], "value": ["80", "100"],
+    }, dtype="string")
+
+    file_path = DataCleaner.clean_trade_data_year("2000", country_data, gdp_deflator, chunksize=2)
+
+    assert file_path.suffix == ".parquet" and sorted(path.name for path in cleaned_directory.iterdir()) == [file_path.name]
+    cleaned = TradeDataLoader(cleaned_directory).load_trade_data(2000, columns=["exporter_iso_code_3", "importer_iso_code_3", "money", "mass"])
+    expected = DataFrame({
+        "exporter_iso_code_3": ["ARG", "ARG", "BRA", "BRA", "USA"],
+        "importer_iso_code_3": ["BRA", "USA", "ARG", "USA", "ARG"],
+        "money": [1.0, 3.0, 5.0, 2.0, 4.0],
+        "mass": [1.5, 2.0, 4.0, 0.0, 3.0],
+    })
+    expected["money"] = expected["money"] / 80 * 100 * 100
+    pd.testing.assert_frame_equal(cleaned.astype({"exporter_iso_code_3": object, "importer_iso_code_3": object}), expected)
@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from complex_trade_flow.complexity import ComplexityCalculator
+
+
+def test_rca_and_complexity_of_nested_matrix():
+    exports = sparse.csr_matrix(np.array([
+        [1.0, 1.0, 1.0, 1.0],
+        [1.0, 1.0, 1.0, 0.0],
+        [1.0, 1.0, 0.0, 0.0],
+        [1.0, 0.0, 0.0, 0.0],
+    ]))
+    rca = ComplexityCalculator.calculate_rca_matrix(exports)
+    assert np.isclose(rca[0, 3], (1 / 4) / (1 / 10))
+
+    entity_complexity, product_complexity = ComplexityCalculator.calculate_complexity(
+        exports, pd.Index(["A", "B", "C", "D"]), pd.Index([1, 2, 3, 4])
+    )
+    # The most diversified entity is the most complex and the most ubiquitous product the least
+    assert entity_complexity["ECI"].idxmax() == "A"
+    assert product_complexity["PCI"].idxmin() == 1
+    assert np.isclose(entity_complexity["ECI"].mean(), 0.0)
+
+
+def test_fitness_complexity_warm_start():
+    rng = np.random.default_rng(0)
+    exports = rng.lognormal(size=(30, 200)) * (rng.random((30, 200)) < rng.random((30, 1)))
+    specialization = ComplexityCalculator.calculate_specialization_matrix(sparse.csr_matrix(exports))
+
+    fitness, complexity, iterations = ComplexityCalculator.calculate_fitness_complexity(specialization)
+    assert np.isclose(np.nanmean(fitness), 1.0)
+    assert np.corrcoef(fitness, specialization.sum(axis=1).A.ravel())[0, 1] > 0
+
+    _, _, warm_iterations = ComplexityCalculator.calculate_fitness_complexity(
+        specialization, initial_fitness=fitness, initial_complexity=complexity
+    )
+    assert warm_iterations < iterations
@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from complex_trade_flow.diversity_metrics import DiversityCalculator
+
+
+def test_hill_numbers_special_orders():
+    probabilities = np.array([
+        [0.5, 0.25, 0.25, 0.0],
+        [0.7, 0.1, 0.1, 0.1],
+        [0.0, 0.0, 0.0, 0.0],
+    ])
+    hill_numbers = DiversityCalculator.calculate_hill_numbers(probabilities, orders=(0, 1, 2, np.inf))
+
+    np.testing.assert_allclose(hill_numbers[:2, 0], [3, 4])
+    np.testing.assert_allclose(hill_numbers[:2, 1], np.exp(stats.entropy(probabilities[:2], axis=1)))
+    np.testing.assert_allclose(hill_numbers[:2, 2], 1 / np.sum(probabilities[:2] ** 2, axis=1))
+    np.testing.assert_allclose(hill_numbers[:2, 3], [2, 1 / 0.7])
+    # Las probabilidades nulas se ignoran; una fila sin probabilidad no es una distribución
+    assert np.isnan(hill_numbers[2]).all()
+
+
+def test_hill_numbers_of_uniform_distribution():
+    orders = (0, 0.5, 1, 2, 3.7, np.inf)
+    hill_numbers = DiversityCalculator.calculate_hill_numbers(np.full((1, 8), 1 / 8), orders)
+    np.testing.assert_allclose(hill_numbers, np.full((1, len(orders)), 8.0))
+
+
+def test_hill_number_of_order_one_matches_diversity_index():
+    rng = np.random.default_rng(0)
+    data = pd.DataFrame({
+        "exporter": rng.integers(0, 5, 300),
+        "product_category_code": rng.integers(0, 12, 300),
+        "money": rng.random(300),
+    })
+    profile = DiversityCalculator.calculate_diversity_profile_by_group(data, "exporter", orders=(1,))
+    expected = [
+        DiversityCalculator.calculate_diversity_index(data[data["exporter"] == exporter])
+        for exporter in profile.index
+    ]
+    np.testing.assert_allclose(profile[1].to_numpy(), expected)
+
+
+def _flows(rng, n_rows=3000, n_products=8):
+    return pd.DataFrame({
+        "exporter": rng.integers(0, 4, n_rows),
+        "product_category_code": rng.integers(0, n_products, n_rows),
+        "money": rng.lognormal(0, 0.5, n_rows),
+    })
+
+
+def test_bootstrap_is_reproducible_and_independent_of_chunk_size():
+    data = _flows(np.random.default_rng(1))
+    for resampling in ("multinomial", "poisson"):
+        intervals = DiversityCalculator.bootstrap_diversity_index_by_group(
+            data, "exporter", n_replicates=200, resampling=resampling, seed=3
+        )
+        repeated = DiversityCalculator.bootstrap_diversity_index_by_group(
+            data, "exporter", n_replicates=200, resampling=resampling, seed=3
+        )
+        chunked = DiversityCalculator.bootstrap_diversity_index_by_group(
+            data, "exporter", n_replicates=200, resampling=resampling, seed=3, chunk_size=7
+        )
+        pd.testing.assert_frame_equal(intervals, repeated)
+        pd.testing.assert_frame_equal(intervals, chunked)
+
+
+def test_bootstrap_interval_brackets_point_estimate():
+    data = _flows(np.random.default_rng(1))
+    intervals = DiversityCalculator.bootstrap_diversity_index_by_group(data, "exporter", n_replicates=500, seed=0)
+    expected = DiversityCalculator.calculate_diversity_index_by_group(data, "exporter")
+
+    np.testing.assert_allclose(intervals["diversity"], expected.reindex(intervals.index))
+    assert (intervals["ci_lower"] <= intervals["diversity"]).all()
+    assert (intervals["diversity"] <= intervals["ci_upper"]).all()
+    assert (intervals["standard_error"] > 0).all()
+
+
+def test_bootstrap_of_single_product_groups_has_zero_width():
+    data = _flows(np.random.default_rng(2), n_rows=200)
+    data["product_category_code"] = data["exporter"]
+    intervals = DiversityCalculator.bootstrap_diversity_index_by_group(data, "exporter", n_replicates=100, seed=0)
+
+    np.testing.assert_allclose(intervals[["diversity", "ci_lower", "ci_upper"]], 1.0)
+    np.testing.assert_allclose(intervals["standard_error"], 0.0, atol=1e-12)
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from complex_trade_flow.indicators import IndicatorStore
+from complex_trade_flow.trade_graph import TradeGraph
+
+
+def test_indicator_store_enrich(tmp_path):
+    pd.DataFrame({
+        "countryiso3code": ["ARG", "BRA", "USA", None],
+        "date": [2000, 2000, 2001, 2000],
+        "value": [20.0, 10.0, 15.0, 12.0],
+    }).to_csv(tmp_path / "NE.IMP.GNFS.ZS_1995-2022.csv", index=False)
+    pd.DataFrame({
+        "countryiso3code": ["ARG", "BRA", "USA"],
+        "date": [2000, 2000, 2000],
+        "value": [1.0, 2.0, 3.0],
+    }).to_csv(tmp_path / "NY.GDP.MKTP.CD_1995-2022.csv", index=False)
+    store = IndicatorStore(tmp_path)
+    edges = pd.DataFrame({
+        "exporter_iso_code_3": ["ARG", "BRA", "USA"],
+        "importer_iso_code_3": ["BRA", "USA", "ARG"],
+        "money": [1.0, 2.0, 3.0],
+    })
+
+    graph = store.enrich(TradeGraph.from_edges(edges), 2000)
+
+    assert store.values.shape == (3, 2, 2)
+    assert list(graph.nodes) == ["ARG", "BRA"]
+    np.testing.assert_allclose(graph.node_attributes["propension"], [20.0, 10.0])
+    np.testing.assert_allclose(graph.node_attributes["ingreso"], [1.0, 2.0])
+    assert store.load_indicator_year("NE.IMP.GNFS.ZS", 2001).to_dict() == {"USA": 15.0}
+
+
+def test_indicator_store_rejects_unknown_years(tmp_path):
+    for indicator in ("NE.IMP.GNFS.ZS", "NY.GDP.MKTP.CD", "SP.POP.TOTL"):
+        pd.DataFrame({
+            "countryiso3code": ["ARG", "BRA"],
+            "date": [2000, 2000],
+            "value": [1.0, 2.0],
+        }).to_csv(tmp_path / f"{indicator}_1995-2022.csv", index=False)
+    store = IndicatorStore(tmp_path)
+
+    # Indicadores fuera del arreglo se leen de su archivo, como antes
+    assert store.load_indicator_year("SP.POP.TOTL", 2000).to_dict() == {"ARG": 1.0, "BRA": 2.0}
+    for indicator, year in [("NY.GDP.MKTP.CD", 1999), ("NY.GDP.MKTP.CD", "2000"), ("SP.POP.TOTL", 1999)]:
+        with pytest.raises(KeyError):
+            store.load_indicator_year(indicator, year)
+    with pytest.raises(KeyError):
+        store.get_year(1999, ["ARG"])
@@ -1,6 +1,9 @@
 import pytest
+import numpy as np
+import pandas as pd
 
-from complex_trade_flow.networks import TradeNetwork
+from complex_trade_flow.networks import SharedTradeNetwork, TradeNetwork, TradeNetworkCache
+from complex_trade_flow.trade_data_loader import TradeDataLoader
 from complex_trade_flow.utils import ClassificationScheme
 
 
@@ -23,3 +26,147 @@ def test_trade_netwok_initialization_region():
     assert trade_network.trade_data_classified.shape[0] == trade_network.trade_data.shape[0]
     assert region_scheme.name == list(trade_network.entities.keys())[0]
     assert "by_region_exporter" in list(trade_network.trade_data_classified.columns)
+
+
+def test_trade_network_compact_matches_labels():
+    trade_data = pd.DataFrame({
+        "exporter_iso_code_3": ["ARG", "BRA", "ARG", "USA"],
+        "importer_iso_code_3": ["BRA", "USA", "USA", "ARG"],
+        "product_category_code": [10121, 10121, 20110, 30110],
+        "money": [1.0, 2.0, 3.0, 4.0],
+    })
+    sin_pais = ClassificationScheme(name="SinPaís")
+    trade_network = TradeNetwork(trade_data, [sin_pais])
+    compact_network = TradeNetwork(trade_data, [sin_pais], compact=True)
+
+    assert compact_network.countries == trade_network.countries
+    assert compact_network.trade_data["exporter_iso_code_3"].dtype == "int16"
+    pd.testing.assert_frame_equal(
+        compact_network.filter_data_by_entities(sin_pais.name, exporters=["ARG"]).astype(object),
+        trade_network.filter_data_by_entities(sin_pais.name, exporters=["ARG"]).astype(object),
+    )
+
+
+def test_trade_network_classification_shares_trade_data():
+    trade_data = pd.DataFrame({
+        "exporter_iso_code_3": pd.Categorical(["ARG", "BRA", "ARG", None]),
+        "importer_iso_code_3": pd.Categorical(["BRA", "USA", "USA", "ARG"]),
+        "product_category_code": [10121, 10121, 20110, 30110],
+        "money": [1.0, 2.0, 3.0, 4.0],
+    })
+    sin_pais = ClassificationScheme(name="SinPaís")
+    trade_network = TradeNetwork(trade_data, [sin_pais])
+
+    classified = trade_network.trade_data_classified
+    assert np.shares_memory(classified["money"].to_numpy(), trade_data["money"].to_numpy())
+    assert classified["SinPaís_exporter"].dtype == "category"
+    assert classified["SinPaís_exporter"].astype(object).tolist()[:3] == ["ARG", "BRA", "ARG"]
+    assert len(trade_network.filter_data_by_entities(sin_pais.name, importers=["USA"])) == 2
+
+
+def _save_years(directory, years):
+    rng = np.random.default_rng(0)
+    for year in years:
+        TradeDataLoader(directory).save_trade_data(pd.DataFrame({
+            "product_category_code": rng.integers(0, 60, 1000),
+            "exporter_iso_code_3": [f"C{code:02d}" for code in rng.integers(0, 20, 1000)],
+            "importer_iso_code_3": [f"C{code:02d}" for code in rng.integers(0, 20, 1000)],
+            "money": rng.lognormal(size=1000),
+        }), year)
+
+
+def test_trade_network_cache_counters_and_sizes(tmp_path, monkeypatch):
+    _save_years(tmp_path, [2000, 2001, 2002])
+    pd.DataFrame({"id": [f"C{code:02d}" for code in range(20)], "region": ["A", "B"] * 10}).to_csv(
+        tmp_path / "regions.csv", index=False
+    )
+    sin_pais = ClassificationScheme(name="SinPaís")
+    by_region = ClassificationScheme("by_region", str(tmp_path / "regions.csv"), "id", "region")
+
+    network_bytes = TradeNetwork.from_year(2000, tmp_path, [sin_pais]).memory_usage()
+    cache = TradeNetworkCache(max_bytes=int(2.5 * network_bytes))
+    for year in (2000, 2001, 2000, 2002):
+        cache.get(year, tmp_path, [sin_pais])
+    assert cache.stats() == {"hits": 1, "misses": 3, "evictions": 1, "networks": 2, "nbytes": 2 * network_bytes}
+
+    # Un acierto sin esquemas nuevos no vuelve a medir la red; uno con esquemas nuevos solo suma sus columnas
+    measured = []
+    memory_usage = TradeNetwork.memory_usage
+    monkeypatch.setattr(TradeNetwork, "memory_usage", lambda self: measured.append(self) or memory_usage(self))
+    cache.get(2002, tmp_path, [sin_pais])
+    network = cache.get(2002, tmp_path, [sin_pais, by_region])
+    assert measured == []
+    assert "by_region_exporter" in network.trade_data_classified
+    assert cache.stats()["hits"] == 3
+    assert cache.nbytes == network_bytes + memory_usage(network)
+
+    # Los índices por entidad y el tensor que construyen los análisis también cuentan
+    cache.max_bytes = cache.nbytes
+    network.filter_data_by_entities("by_region", exporters=["A"])
+    network.trade_tensor()
+    assert network.derived_memory_usage() > 0
+    assert cache.nbytes == network_bytes + memory_usage(network)
+    cache.trim()
+    assert cache.stats()["evictions"] == 2 and cache.nbytes == memory_usage(network)
+
+
+def test_shared_trade_network_round_trip(tmp_path):
+    trade_data = pd.DataFrame({
+        "exporter_iso_code_3": pd.Categorical(["ARG", "BRA", "ARG", "USA"]),
+        "importer_iso_code_3": ["BRA", "USA", "USA", "ARG"],
+        "product_category_code": [10121, 10121, 20110, 30110],
+        "money": [1.0, 2.0, 3.0, 4.0],
+    })
+    sin_pais = ClassificationScheme(name="SinPaís")
+    trade_network = TradeNetwork(trade_data, [sin_pais])
+
+    shared_network = trade_network.share(str(tmp_path))
+    attached = shared_network.attach()
+    assert shared_network.attach() is attached
+    assert attached.entities == trade_network.entities
+    pd.testing.assert_frame_equal(
+        attached.trade_data_classified.astype(object), trade_network.trade_data_classified.astype(object)
+    )
+    pd.testing.assert_frame_equal(
+        attached.filter_data_by_entities(sin_pais.name, exporters=["ARG"]).astype(object).reset_index(drop=True),
+        trade_network.filter_data_by_entities(sin_pais.name, exporters=["ARG"]).astype(object).reset_index(drop=True),
+    )
+
+    shared_network.detach()
+    assert shared_network.attach() is not attached
+    SharedTradeNetwork.detach_all()
+
+
+def test_entity_rows_match_boolean_masks():
+    trade_data = pd.DataFrame({
+        "exporter_iso_code_3": ["ARG", "BRA", None, "USA", "ARG", None, "BRA"],
+        "importer_iso_code_3": ["BRA", None, "USA", "ARG", "USA", "ARG", "ARG"],
+        "product_category_code": [1, 2, 3, 4, 5, 6, 7],
+        "money": [1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0],
+    })
+    sin_pais = ClassificationScheme(name="SinPaís")
+    queries = [["ARG"], ["ZZZ"], [np.nan], ["ARG", np.nan, "ZZZ"], ["BRA", "USA"]]
+
+    for compact in (False, True):
+        trade_network = TradeNetwork(trade_data, [sin_pais], compact=compact)
+        classified = trade_network.trade_data_classified
+
+        def mask(direction, entities):
+            column = classified[f"SinPaís_{direction}"]
+            if compact:
+                # En una red compacta las filas sin entidad (código -1) no pertenecen a ninguna
+                codes = trade_network.code_dictionaries["SinPaís"].encode(entities)
+                return column.isin(codes[codes >= 0]).to_numpy()
+            return column.isin(entities).to_numpy()
+
+        assert trade_network._entity_rows("SinPaís") is None
+        for entities in queries:
+            np.testing.assert_array_equal(
+                trade_network._entity_rows("SinPaís", exporters=entities), np.flatnonzero(mask("exporter", entities))
+            )
+            np.testing.assert_array_equal(
+                trade_network._entity_rows("SinPaís", importers=["ARG"], exporters=entities),
+                np.flatnonzero(mask("importer", ["ARG"]) & mask("exporter", entities))
+            )
+        if not compact:
+            np.testing.assert_array_equal(trade_network._entity_rows("SinPaís", exporters=[np.nan]), [2, 5])
@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import sparse
+
+from complex_trade_flow.networks import TradeNetwork
+from complex_trade_flow.product_space import ProductSpace
+from complex_trade_flow.trade_data_loader import TradeDataLoader
+from complex_trade_flow.utils import ClassificationScheme
+
+
+def test_proximity_is_min_conditional_probability():
+    specialization = sparse.csr_matrix(np.array([
+        [1.0, 1.0, 0.0],
+        [1.0, 0.0, 1.0],
+        [1.0, 1.0, 0.0],
+    ]))
+    proximity = ProductSpace.calculate_proximity(specialization, block_size=2).toarray()
+    # P(1 | 0) = 2/3 and P(0 | 1) = 1, so the proximity is 2/3
+    np.testing.assert_allclose(proximity, [[0, 2 / 3, 1 / 3], [2 / 3, 0, 0], [1 / 3, 0, 0]])
+
+    thresholded = ProductSpace.calculate_proximity(specialization, threshold=0.5, dtype=np.float32)
+    assert thresholded.dtype == np.float32 and thresholded.nnz == 2
+
+
+def test_for_year_recomputes_when_options_change(tmp_path):
+    rng = np.random.default_rng(0)
+    trade_data = pd.DataFrame({
+        "product_category_code": rng.integers(0, 30, 2000),
+        "exporter_iso_code_3": [f"C{code:02d}" for code in rng.integers(0, 20, 2000)],
+        "importer_iso_code_3": [f"C{code:02d}" for code in rng.integers(0, 20, 2000)],
+        "money": rng.random(2000),
+    })
+    TradeDataLoader(tmp_path).save_trade_data(trade_data, 2000)
+    directory = tmp_path / "product_space"
+
+    dense = ProductSpace.for_year(2000, directory, base_directory=tmp_path)
+    sparse_space = ProductSpace.for_year(2000, directory, base_directory=tmp_path, threshold=0.5)
+    cached = ProductSpace.for_year(2000, directory, base_directory=tmp_path, threshold=0.5)
+
+    assert sparse_space.proximity.nnz < dense.proximity.nnz
+    assert sparse_space.proximity.data.min() >= 0.5
+    assert (cached.proximity != sparse_space.proximity).nnz == 0
+
+
+def test_for_year_by_scheme(tmp_path):
+    rng = np.random.default_rng(0)
+    TradeDataLoader(tmp_path).save_trade_data(pd.DataFrame({
+        "product_category_code": rng.integers(0, 30, 2000),
+        "exporter_iso_code_3": [f"C{code:02d}" for code in rng.integers(0, 20, 2000)],
+        "importer_iso_code_3": [f"C{code:02d}" for code in rng.integers(0, 20, 2000)],
+        "money": rng.random(2000),
+    }), 2000)
+    pd.DataFrame({"id": [f"C{code:02d}" for code in range(20)], "region": list("ABCD") * 5}).to_csv(
+        tmp_path / "regions.csv", index=False
+    )
+    by_region = ClassificationScheme("by_region", str(tmp_path / "regions.csv"), "id", "region")
+    directory = tmp_path / "product_space"
+
+    with pytest.raises(ValueError):
+        ProductSpace.for_year(2000, directory, base_directory=tmp_path, scheme_name="by_region")
+    by_country = ProductSpace.for_year(2000, directory, base_directory=tmp_path)
+    regional = ProductSpace.for_year(
+        2000, directory, base_directory=tmp_path, classification_schemes=[by_region], scheme_name="by_region"
+    )
+
+    network = TradeNetwork.from_year(2000, tmp_path, [by_region])
+    expected = ProductSpace.from_trade_network(network, scheme_name="by_region")
+    assert (regional.proximity != expected.proximity).nnz == 0
+    assert (regional.proximity != by_country.proximity).nnz > 0
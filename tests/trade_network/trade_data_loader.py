@@ -0,0 +1,108 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+from complex_trade_flow.constants import StorageFormat
+from complex_trade_flow.trade_data_loader import TradeDataLoader
+
+
+def _trade_data(rng, year, n_rows=2000):
+    return pd.DataFrame({
+        "year": year,
+        "product_category_code": rng.integers(10000, 999999, n_rows),
+        "exporter_iso_code_3": [f"C{code:02d}" for code in rng.integers(0, 40, n_rows)],
+        "importer_iso_code_3": [f"C{code:02d}" for code in rng.integers(0, 40, n_rows)],
+        "money": rng.random(n_rows),
+    })
+
+
+def test_writer_row_groups_do_not_overlap(tmp_path):
+    rng = np.random.default_rng(0)
+    loader = TradeDataLoader(tmp_path)
+    chunks = [_trade_data(rng, 2000) for _ in range(6)]
+    with loader.open_writer(2000, sort_buffer_rows=2500) as writer:
+        for chunk in chunks:
+            writer.write(chunk)
+
+    metadata = pq.ParquetFile(writer.file_path).metadata
+    exporter = metadata.schema.names.index("exporter_iso_code_3")
+    ranges = [
+        (metadata.row_group(i).column(exporter).statistics.min, metadata.row_group(i).column(exporter).statistics.max)
+        for i in range(metadata.num_row_groups)
+    ]
+    assert len(ranges) > 1
+    assert all(previous[1] < current[0] for previous, current in zip(ranges, ranges[1:]))
+    assert list(tmp_path.iterdir()) == [writer.file_path]
+
+    trade_data = loader.load_trade_data(2000, filters=[("exporter_iso_code_3", "in", ["C05", "C31"])])
+    expected = pd.concat(chunks)
+    assert np.isclose(trade_data["money"].sum(), expected[expected["exporter_iso_code_3"].isin(["C05", "C31"])]["money"].sum())
+
+
+def test_load_panel_filters_and_stacks_years(tmp_path):
+    rng = np.random.default_rng(1)
+    loader = TradeDataLoader(tmp_path)
+    yearly_data = {year: _trade_data(rng, year) for year in (2000, 2001)}
+    for year, trade_data in yearly_data.items():
+        loader.save_trade_data(trade_data, year)
+
+    panel = loader.load_panel(2000, 2001, exporters=["C01", "C02"], hs_prefixes=["1", "45"])
+
+    expected = pd.concat(yearly_data.values())
+    expected = expected[
+        expected["exporter_iso_code_3"].isin(["C01", "C02"])
+        & (expected["product_category_code"].between(100000, 199999) | expected["product_category_code"].between(450000, 459999))
+    ]
+    assert panel["year"].dtype == "int16"
+    assert isinstance(panel["exporter_iso_code_3"].dtype, pd.CategoricalDtype)
+    assert panel.groupby("year").size().to_dict() == expected.groupby("year").size().to_dict()
+    assert np.isclose(panel["money"].sum(), expected["money"].sum())
+
+    with pytest.raises(ValueError):
+        loader.load_panel(2001, 2000)
+
+
+def test_writer_leaves_no_file_on_error(tmp_path):
+    loader = TradeDataLoader(tmp_path)
+    for storage_format in (StorageFormat.PARQUET, StorageFormat.CSV):
+        with pytest.raises(RuntimeError):
+            with loader.open_writer(2000, storage_format) as writer:
+                writer.write(_trade_data(np.random.default_rng(0), 2000))
+                raise RuntimeError("interrupted year")
+        assert list(tmp_path.iterdir()) == []
+
+
+def test_panel_filters_translate_hs_prefixes():
+    assert TradeDataLoader.panel_filters() is None
+    assert TradeDataLoader.panel_filters(exporters=["ARG"]) == [[("exporter_iso_code_3", "in", ["ARG"])]]
+    assert TradeDataLoader.panel_filters(products=["10121"], hs_prefixes=["27", "8703"]) == [
+        [("product_category_code", "in", [10121]), ("product_category_code", ">=", 270000), ("product_category_code", "<=", 279999)],
+        [("product_category_code", "in", [10121]), ("product_category_code", ">=", 870300), ("product_category_code", "<=", 870399)],
+    ]
+
+
+def test_csv_fallback_matches_parquet(tmp_path):
+    trade_data = _trade_data(np.random.default_rng(2), 2000)
+    parquet_loader, csv_loader = TradeDataLoader(tmp_path / "parquet"), TradeDataLoader(tmp_path / "csv")
+    for loader, storage_format in ((parquet_loader, StorageFormat.PARQUET), (csv_loader, StorageFormat.CSV)):
+        Path(loader.data_dir).mkdir()
+        loader.save_trade_data(trade_data, 2000, storage_format)
+    assert csv_loader.find_trade_data_file(2000).suffix == ".csv"
+
+    columns = ["importer_iso_code_3", "money"]
+    filters = TradeDataLoader.panel_filters(exporters=["C03", "C17"], hs_prefixes=["2", "65"])
+    results = [
+        loader.load_trade_data(2000, columns=columns, filters=filters)
+        for loader in (parquet_loader, csv_loader)
+    ]
+    for result in results:
+        assert list(result.columns) == columns and len(result) > 0
+
+    def normalized(result):
+        result = result.astype({"importer_iso_code_3": str})
+        return result.sort_values(columns, ignore_index=True)
+
+    pd.testing.assert_frame_equal(normalized(results[0]), normalized(results[1]))
@@ -0,0 +1,24 @@
+import networkx as nx
+import numpy as np
+import pandas as pd
+
+from complex_trade_flow.trade_graph import TradeGraph
+
+
+def test_trade_graph_from_edges():
+    edges = pd.DataFrame({
+        "exporter_iso_code_3": ["ARG", "ARG", "BRA", "USA", "ARG"],
+        "importer_iso_code_3": ["BRA", "USA", "USA", "ARG", "BRA"],
+        "money": [1.0, 3.0, 2.0, 4.0, 1.0],
+    })
+    graph = TradeGraph.from_edges(edges)
+    graph.set_node_attribute("ingreso", pd.Series({"ARG": 10.0, "USA": 30.0}))
+
+    assert list(graph.nodes) == ["ARG", "BRA", "USA"]
+    np.testing.assert_allclose(graph.normalize().adjacency.toarray(), [[0, 0.4, 0.6], [0, 0, 1], [1, 0, 0]])
+
+    complete = graph.subgraph(graph.complete_nodes(["ingreso"]))
+    networkx_graph = complete.to_networkx()
+    assert list(networkx_graph.nodes) == ["ARG", "USA"]
+    assert networkx_graph["ARG"]["USA"]["weight"] == 3.0
+    assert nx.get_node_attributes(networkx_graph, "ingreso") == {"ARG": 10.0, "USA": 30.0}
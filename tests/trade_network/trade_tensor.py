@@ -0,0 +1,25 @@
+import numpy as np
+import pandas as pd
+
+from complex_trade_flow.networks import TradeNetwork
+
+
+def test_trade_tensor_marginals_and_matrices():
+    trade_data = pd.DataFrame({
+        "exporter_iso_code_3": ["ARG", "BRA", "ARG", "USA"],
+        "importer_iso_code_3": ["BRA", "USA", "USA", "ARG"],
+        "product_category_code": [10121, 10121, 20110, 30110],
+        "money": [1.0, 2.0, 3.0, 4.0],
+        "mass": [10.0, 20.0, 30.0, 40.0],
+    })
+    for compact in (False, True):
+        tensor = TradeNetwork(trade_data, compact=compact).trade_tensor()
+
+        assert tensor.shape == (3, 3, 3)
+        assert tensor.marginal("exporter").to_dict() == {"ARG": 4.0, "BRA": 2.0, "USA": 4.0}
+        assert tensor.marginal("product", "mass").to_dict() == {10121: 30.0, 20110: 30.0, 30110: 40.0}
+        np.testing.assert_array_equal(
+            tensor.matrix("exporter", "importer").toarray(),
+            [[0.0, 1.0, 3.0], [0.0, 0.0, 2.0], [4.0, 0.0, 0.0]]
+        )
+        assert tensor.slice("importer", ["USA"]).marginal("exporter").to_dict() == {"ARG": 3.0, "BRA": 2.0, "USA": 0.0}